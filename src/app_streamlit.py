@@ -1,130 +1,65 @@
-import streamlit as st
-import pandas as pd
-import joblib
-import os
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
 
-import pdfplumber
-from PIL import Image
-import pytesseract
+import streamlit as st
 
-MODEL_PATH = os.path.join("models", "shopping_time_model.joblib")
+# pandas, pdfplumber, PIL et pytesseract ne sont importés que par les
+# extractions qui en ont besoin ; le modèle est chargé en arrière-plan
+from document_extraction import start_extraction
+from model_store import MODEL_PATH, get_model_holder
+from shopping_list_parser import parse_shopping_list_text
 
 
-@st.cache_resource
 def load_model():
-    if not os.path.exists(MODEL_PATH):
-        raise FileNotFoundError(
-            f"Modèle introuvable : {MODEL_PATH}. Lance d'abord python src/train_model.py"
-        )
-    return joblib.load(MODEL_PATH)
+    # Modèle partagé par toutes les sessions ; bascule sur le modèle courant du
+    # registre dès qu'il change, sans redémarrer l'app
+    return get_model_holder(MODEL_PATH).get()
 
 
-def setup_tesseract_if_needed():
-    """Configure le chemin de Tesseract si nécessaire (Windows)."""
-    pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+def start_model_warm_up():
+    """Charge le modèle dans un thread pendant l'affichage du formulaire."""
+    if get_model_holder(MODEL_PATH).version is not None:
+        return
 
+    def warm_up():
+        try:
+            import prediction_cache  # noqa: F401
 
+            load_model()
+        except Exception:
+            # L'erreur sera affichée au clic sur "Prédire"
+            pass
 
-def parse_shopping_list_text(text: str):
-    text = text.lower()
-
-    categories = {
-        "alimentaire": [
-            # anciens mots
-            "yaourt", "yaourts", "pomme", "riz", "pates", "pâtes", "lait", "pain", "fromage", "steak",
-            # viandes
-            "boeuf", "bœuf", "poulet", "cuisse", "cuisses", "blanc de poulet", "côte", "cotis",
-            # poissons
-            "poisson", "bar", "tilapia",
-            # féculents / accompagnements
-            "riz", "riz cassé", "macedoine", "macédoine", "mais", "maïs",
-            # légumes / condiments
-            "tomate", "tomates", "poivron", "ail", "sauce",
-            # autres
-            "huile"
-        ],
-        "vetements": ["jean", "jeans", "robe", "tshirt", "t-shirt", "chemise", "pantalon"],
-        "electronique": ["tv", "télé", "tele", "télévision", "telephone", "smartphone", "ordinateur", "laptop", "tablette"],
-        "maison": ["coussin", "assiette", "verre", "rideau", "linge", "poele", "poêle", "casserole"],
-        "beaute": ["shampoing", "shampooing", "gel douche", "parfum", "maquillage", "creme", "crème"],
-        "sport": ["ballon", "chaussures de sport", "dumbbell", "tapis yoga"],
-        "librairie": ["livre", "cahier", "stylo", "agenda"],
-    }
-
-    counts = {
-        "items_alimentaire": 0,
-        "items_vetements": 0,
-        "items_electronique": 0,
-        "items_maison": 0,
-        "items_beaute": 0,
-        "items_sport": 0,
-        "items_librairie": 0,
-    }
-
-    for cat, keywords in categories.items():
-        for kw in keywords:
-            if kw in text:
-                if cat == "alimentaire":
-                    counts["items_alimentaire"] += 1
-                elif cat == "vetements":
-                    counts["items_vetements"] += 1
-                elif cat == "electronique":
-                    counts["items_electronique"] += 1
-                elif cat == "maison":
-                    counts["items_maison"] += 1
-                elif cat == "beaute":
-                    counts["items_beaute"] += 1
-                elif cat == "sport":
-                    counts["items_sport"] += 1
-                elif cat == "librairie":
-                    counts["items_librairie"] += 1
-
-    return counts
-
+    threading.Thread(target=warm_up, daemon=True).start()
 
 
 def extract_text_from_uploaded_file(uploaded_file):
     """
     Gère TXT, CSV, PDF, image (PNG/JPG) et renvoie une chaîne de texte.
+    OCR et pages PDF sont traités dans un pool de processus ; une barre de
+    progression s'affiche pendant l'attente. Un fichier déjà vu (même
+    contenu) est servi par le cache, sans nouvelle extraction.
     """
-    filename = uploaded_file.name.lower()
-
-    # TXT
-    if filename.endswith(".txt"):
-        return uploaded_file.read().decode("utf-8", errors="ignore")
-
-    # CSV
-    if filename.endswith(".csv"):
-        df = pd.read_csv(uploaded_file)
-        # On prend toutes les colonnes et toutes les lignes, concaténées
-        text = " ".join(df.astype(str).values.ravel().tolist())
-        return text
-
-    # PDF
-    if filename.endswith(".pdf"):
-        text = ""
-        with pdfplumber.open(uploaded_file) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text() or ""
-                text += "\n" + page_text
-        return text
-
-    # Images : png, jpg, jpeg
-    if filename.endswith((".png", ".jpg", ".jpeg")):
-        setup_tesseract_if_needed()
-        image = Image.open(uploaded_file)
-        text = pytesseract.image_to_string(image, lang="fra+eng")  # français + anglais
-        return text
-
-    # Si format non géré :
-    raise ValueError("Format de fichier non supporté. Utilise txt, csv, pdf, png, jpg ou jpeg.")
+    job = start_extraction(uploaded_file.name, uploaded_file.getvalue())
+    if job.done():
+        return job.result()
+
+    progress = st.progress(0.0, text="Extraction du texte...")
+    while True:
+        try:
+            text = job.result(timeout=0.2)
+            break
+        except FutureTimeoutError:
+            progress.progress(job.progress(), text=f"Extraction du texte... {job.progress():.0%}")
+    progress.empty()
+    return text
 
 
 def main():
     st.title("🛒 Prédiction du temps de shopping")
     st.write("Estime le temps passé en magasin en fonction du profil client et de sa liste de courses.")
 
-    model = load_model()
+    start_model_warm_up()
 
     # =========================
     # Sidebar : infos client
@@ -282,9 +217,56 @@ def main():
     # Prédiction
     # =========================
     if st.button("Prédire le temps de shopping"):
-        X = pd.DataFrame(input_dict)
-        y_pred = model.predict(X)[0]
+        from prediction_cache import get_prediction_cache
+
+        holder = get_model_holder(MODEL_PATH)
+        model, version = holder.get_versioned()
+        info = holder.info()
+        # Cache partagé par toutes les sessions, invalidé au rechargement du modèle
+        cache = get_prediction_cache()
+        y_pred = cache.predict_records(model, [input_dict], version=version)[0]
         st.subheader(f"⏱ Temps estimé : {y_pred:.1f} minutes")
+        stats = cache.stats()
+        st.caption(
+            f"Modèle {version} (chargé en {info['load_time_s']:.2f} s) · "
+            f"cache : {stats['hits']} hits / {stats['misses']} misses"
+        )
+
+    # =========================
+    # Et si ? (balayage heure x jour x magasin)
+    # =========================
+    with st.expander("🔀 Et si je venais à un autre moment ?"):
+        view = st.selectbox(
+            "Vue",
+            ["Heure × jour", "Heure × type de magasin", "Jour × type de magasin", "Courbe par heure"],
+        )
+        if st.button("Calculer le balayage"):
+            from what_if import DAY_LABELS, SWEEP_AXES, sweep, to_grid
+
+            # Tout le balayage (24 x 7 x 4) en un seul predict vectorisé
+            axes = {name: SWEEP_AXES[name] for name in ("hour", "day_of_week", "store_type")}
+            result = sweep(load_model(), input_dict, axes)
+            result["day_of_week"] = result["day_of_week"].map(dict(enumerate(DAY_LABELS)))
+
+            if view == "Courbe par heure":
+                # Jour choisi dans la barre latérale, une courbe par type de magasin
+                day = DAY_LABELS[day_of_week]
+                curve = result[result["day_of_week"] == day]
+                st.line_chart(curve.pivot(index="hour", columns="store_type", values="predicted_time_min"))
+                st.caption(f"Temps estimé (minutes) un {day}, selon l'heure d'arrivée.")
+            else:
+                row_axis, col_axis = {
+                    "Heure × jour": ("hour", "day_of_week"),
+                    "Heure × type de magasin": ("hour", "store_type"),
+                    "Jour × type de magasin": ("day_of_week", "store_type"),
+                }[view]
+                grid = to_grid(result, row_axis, col_axis)
+                if col_axis == "day_of_week":
+                    grid = grid[[day for day in DAY_LABELS if day in grid.columns]]
+                if row_axis == "day_of_week":
+                    grid = grid.loc[[day for day in DAY_LABELS if day in grid.index]]
+                st.dataframe(grid.style.format("{:.1f}").background_gradient(cmap="RdYlGn_r", axis=None))
+                st.caption("Temps estimé (minutes), moyenne sur l'axe non affiché.")
 
 
 if __name__ == "__main__":
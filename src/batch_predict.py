@@ -0,0 +1,113 @@
+import argparse
+import os
+import time
+
+import pandas as pd
+
+from chunk_io import ChunkWriter, iter_chunks
+from features import FEATURES, RAW_VISIT_COLUMNS, add_derived_features
+from model_store import MODEL_PATH, get_model_holder
+from prediction_cache import PredictionCache
+
+PREDICTION_COL = "predicted_time_min"
+
+
+# ==========================
+# Prédiction en lot
+# ==========================
+def predict_chunk(model, chunk, cache=None, version=None):
+    """
+    Dérive les features d'un bloc de visites et fait un seul predict.
+    Avec un cache, seules les configurations jamais vues sont prédites.
+    """
+    X = add_derived_features(chunk)[FEATURES]
+    if cache is not None:
+        return cache.predict_frame(model, X, version=version)
+    return model.predict(X)
+
+
+def predict_file(
+    input_path,
+    output_path,
+    chunk_size=100_000,
+    id_column=None,
+    model=None,
+    cache=None,
+    verbose=True,
+):
+    """
+    Prédit le temps de shopping de toutes les visites de `input_path` et
+    écrit les résultats dans `output_path` au fil de l'eau.
+    Retourne (nombre de lignes, débit en lignes/s).
+    """
+    version = None
+    if model is None:
+        model, version = get_model_holder(MODEL_PATH).get_versioned()
+
+    columns = RAW_VISIT_COLUMNS + ([id_column] if id_column else [])
+
+    n_rows = 0
+    start = time.perf_counter()
+    with ChunkWriter(output_path) as writer:
+        for chunk in iter_chunks(input_path, chunk_size=chunk_size, columns=columns):
+            y_pred = predict_chunk(model, chunk, cache=cache, version=version)
+
+            if id_column:
+                out = pd.DataFrame({id_column: chunk[id_column].to_numpy()})
+            else:
+                out = pd.DataFrame({"row": range(n_rows, n_rows + len(chunk))})
+            out[PREDICTION_COL] = y_pred
+            writer.write(out)
+
+            n_rows += len(chunk)
+            if verbose:
+                elapsed = time.perf_counter() - start
+                print(f"  {n_rows} lignes traitées ({n_rows / elapsed:,.0f} lignes/s)")
+
+    elapsed = time.perf_counter() - start
+    throughput = n_rows / elapsed if elapsed > 0 else 0.0
+    return n_rows, throughput
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Prédiction en lot du temps de shopping (CSV ou Parquet)."
+    )
+    parser.add_argument("input", help="Fichier de visites (.csv ou .parquet)")
+    parser.add_argument("output", help="Fichier de sortie (.csv ou .parquet)")
+    parser.add_argument("--chunk-size", type=int, default=100_000, help="Lignes par bloc")
+    parser.add_argument("--id-column", default=None, help="Colonne identifiant à recopier en sortie")
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=0,
+        help="Taille du cache de prédictions (0 = désactivé)",
+    )
+    args = parser.parse_args()
+
+    if os.path.abspath(args.input) == os.path.abspath(args.output):
+        parser.error("Le fichier de sortie doit être différent du fichier d'entrée.")
+
+    cache = PredictionCache(max_size=args.cache_size) if args.cache_size > 0 else None
+
+    print("=== Prédiction en lot ===")
+    n_rows, throughput = predict_file(
+        args.input,
+        args.output,
+        chunk_size=args.chunk_size,
+        id_column=args.id_column,
+        cache=cache,
+    )
+    info = get_model_holder(MODEL_PATH).info()
+    print(f"{n_rows} prédictions écrites dans : {args.output}")
+    print(f"Débit : {throughput:,.0f} lignes/s (modèle {info['version']})")
+    if cache is not None:
+        stats = cache.stats()
+        print(
+            f"Cache : {stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['hit_rate']:.1%}), {stats['evictions']} évictions"
+        )
+
+
+if __name__ == "__main__":
+    main()
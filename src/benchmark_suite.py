@@ -0,0 +1,201 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+
+from dataset_format import convert_csv
+from feature_encoder import predict_records
+from features import FEATURES
+from generate_data import generate_shopping_dataset
+from model_store import MODEL_PATH
+from shopping_list_parser import parse_shopping_list_text
+from startup_benchmark import time_to_first_prediction, time_to_first_prompt
+from train_model import create_pipeline, load_data, split_data
+
+BASELINE_PATH = os.path.join("benchmarks", "baseline.json")
+RESULTS_DIR = os.path.join("benchmarks", "results")
+
+SHORT_LIST = "10 yaourts, 2 jeans, 1 TV, 3 shampoings"
+
+
+# ==========================
+# Mesure
+# ==========================
+def measure(fn, repeats=5, warmup=1):
+    """Exécute `fn` plusieurs fois et renvoie médiane/min/max en secondes."""
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return summarize(times)
+
+
+def summarize(times):
+    return {
+        "median_s": float(np.median(times)),
+        "min_s": float(np.min(times)),
+        "max_s": float(np.max(times)),
+        "repeats": len(times),
+    }
+
+
+def machine_info():
+    return {
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+    }
+
+
+# ==========================
+# Étapes
+# ==========================
+def run_suite(sizes=(10_000, 100_000, 1_000_000), repeats=5, fit_repeats=3):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            results[f"generate_{n}"] = measure(
+                lambda: generate_shopping_dataset(n_samples=n), repeats=repeats
+            )
+
+        n_load = max(sizes)
+        csv_path = os.path.join(tmp, "data.csv")
+        arrow_path = os.path.join(tmp, "data.arrow")
+        generate_shopping_dataset(n_samples=n_load).to_csv(csv_path, index=False)
+        convert_csv(csv_path, arrow_path)
+        results[f"load_csv_{n_load}"] = measure(lambda: load_data(csv_path), repeats=repeats)
+        results[f"load_arrow_{n_load}"] = measure(lambda: load_data(arrow_path), repeats=repeats)
+
+        df = generate_shopping_dataset(n_samples=5000)
+        X_train, X_test, y_train, _ = split_data(df)
+        results["fit_forest_5000"] = measure(
+            lambda: create_pipeline("forest").fit(X_train, y_train),
+            repeats=fit_repeats,
+            warmup=0,
+        )
+
+        pipeline = create_pipeline("forest").fit(X_train, y_train)
+        model_path = os.path.join(tmp, "model.joblib")
+        joblib.dump(pipeline, model_path)
+        results["model_load"] = measure(lambda: joblib.load(model_path), repeats=repeats)
+
+        one_row = X_test.iloc[[0]]
+        records = [one_row.iloc[0].to_dict()]
+        batch = pd.concat([X_test] * 10, ignore_index=True)[FEATURES]
+        results["predict_single_pipeline"] = measure(lambda: pipeline.predict(one_row), repeats=20)
+        results["predict_single_dict"] = measure(lambda: predict_records(pipeline, records), repeats=20)
+        results[f"predict_batch_{len(batch)}"] = measure(lambda: pipeline.predict(batch), repeats=repeats)
+
+    # Démarrage du CLI dans un interpréteur neuf (imports + modèle entraîné)
+    results["startup_first_prompt"] = summarize(
+        [time_to_first_prompt(repeats=1) for _ in range(repeats)]
+    )
+    if os.path.exists(MODEL_PATH):
+        results["startup_first_prediction"] = summarize(
+            [time_to_first_prediction(repeats=1) for _ in range(repeats)]
+        )
+
+    long_list = "\n".join([SHORT_LIST] * 5000)
+    results["parse_short"] = measure(lambda: parse_shopping_list_text(SHORT_LIST), repeats=200)
+    results["parse_long_20000_items"] = measure(
+        lambda: parse_shopping_list_text(long_list), repeats=repeats
+    )
+    return results
+
+
+# ==========================
+# Comparaison avec la référence
+# ==========================
+def compare(results, baseline, threshold):
+    """
+    Compare les médianes à la référence. Renvoie la liste des étapes qui ont
+    régressé de plus de `threshold` (0.2 = +20 %).
+    """
+    regressions = []
+    for stage, current in results.items():
+        reference = baseline["results"].get(stage)
+        if reference is None:
+            print(f"  {stage:28s} : {current['median_s'] * 1000:10.3f} ms (nouvelle étape)")
+            continue
+        ratio = current["median_s"] / reference["median_s"]
+        status = "RÉGRESSION" if ratio > 1 + threshold else "ok"
+        print(
+            f"  {stage:28s} : {current['median_s'] * 1000:10.3f} ms "
+            f"(référence {reference['median_s'] * 1000:10.3f} ms, x{ratio:.2f}) {status}"
+        )
+        if status != "ok":
+            regressions.append(stage)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de bout en bout du projet.")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--output", default=None, help="Fichier JSON des résultats")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Régression tolérée par étape (0.2 = +20 %%)",
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Enregistre ces résultats comme nouvelle référence",
+    )
+    args = parser.parse_args()
+
+    print("=== Benchmark du projet ===")
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "machine": machine_info(),
+        "results": run_suite(sizes=args.sizes, repeats=args.repeats),
+    }
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Résultats : {output}")
+
+    if args.update_baseline or not os.path.exists(args.baseline):
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Référence enregistrée : {args.baseline}")
+        return
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline["machine"] != report["machine"]:
+        print("Attention : la référence a été mesurée sur une autre machine/configuration.")
+
+    regressions = compare(report["results"], baseline, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} étape(s) en régression de plus de {args.threshold:.0%} : {', '.join(regressions)}")
+        sys.exit(1)
+    print("Aucune régression.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import pandas as pd
+
+from chunk_io import ChunkWriter
+from features import ITEM_COLUMNS
+from shopping_list_parser import parse_shopping_list_text
+
+OUTPUT_COLUMNS = ITEM_COLUMNS + ["total_items", "nb_categories"]
+
+
+# ==========================
+# Lecture du corpus (en flux)
+# ==========================
+def iter_corpus(path, text_column="text", id_column=None, chunk_size=10_000):
+    """
+    Renvoie des paires (identifiant, texte) une par une :
+    - dossier : un fichier .txt par liste (ordre alphabétique, identifiant = nom du fichier) ;
+    - CSV : une liste par ligne, dans la colonne `text_column`.
+    """
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            if name.endswith(".txt"):
+                with open(os.path.join(path, name), encoding="utf-8", errors="ignore") as f:
+                    yield name, f.read()
+        return
+
+    row = 0
+    usecols = [text_column] + ([id_column] if id_column else [])
+    for chunk in pd.read_csv(path, chunksize=chunk_size, usecols=usecols, dtype=str):
+        texts = chunk[text_column].fillna("").tolist()
+        ids = chunk[id_column].tolist() if id_column else range(row, row + len(texts))
+        yield from zip(ids, texts)
+        row += len(texts)
+
+
+def iter_batches(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+# ==========================
+# Travail d'un processus
+# ==========================
+def parse_batch(texts):
+    """Analyse un lot de listes et renvoie les comptes en colonnes."""
+    columns = {col: [] for col in OUTPUT_COLUMNS}
+    for text in texts:
+        counts = parse_shopping_list_text(text)
+        total = 0
+        nb_categories = 0
+        for col in ITEM_COLUMNS:
+            value = counts[col]
+            columns[col].append(value)
+            total += value
+            nb_categories += value > 0
+        columns["total_items"].append(total)
+        columns["nb_categories"].append(nb_categories)
+    return columns
+
+
+def parse_corpus(corpus, workers=None, batch_size=500, max_pending=None):
+    """
+    Répartit le corpus sur un pool de processus par lots de `batch_size` listes.
+    Le nombre de lots en cours est borné (mémoire constante) et les résultats
+    sont rendus dans l'ordre du corpus. Renvoie des DataFrames (un par lot).
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * workers
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for batch in iter_batches(corpus, batch_size):
+            ids = [list_id for list_id, _ in batch]
+            texts = [text for _, text in batch]
+            pending.append((ids, executor.submit(parse_batch, texts)))
+
+            if len(pending) >= max_pending:
+                yield _to_frame(*pending.popleft())
+
+        while pending:
+            yield _to_frame(*pending.popleft())
+
+
+def _to_frame(ids, future):
+    df = pd.DataFrame(future.result(), columns=OUTPUT_COLUMNS)
+    df.insert(0, "list_id", ids)
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Analyse en masse de listes de courses (dossier de .txt ou CSV)."
+    )
+    parser.add_argument("input", help="Dossier de fichiers .txt ou fichier CSV")
+    parser.add_argument("output", help="Fichier de sortie (.csv ou .parquet)")
+    parser.add_argument("--text-column", default="text", help="Colonne texte du CSV")
+    parser.add_argument("--id-column", default=None, help="Colonne identifiant du CSV")
+    parser.add_argument("--workers", type=int, default=None, help="Nombre de processus")
+    parser.add_argument("--batch-size", type=int, default=500, help="Listes par tâche")
+    args = parser.parse_args()
+
+    print("=== Analyse en masse des listes de courses ===")
+    corpus = iter_corpus(args.input, text_column=args.text_column, id_column=args.id_column)
+
+    n_lists = 0
+    start = time.perf_counter()
+    with ChunkWriter(args.output) as writer:
+        for df in parse_corpus(corpus, workers=args.workers, batch_size=args.batch_size):
+            writer.write(df)
+            n_lists += len(df)
+
+    elapsed = time.perf_counter() - start
+    print(f"{n_lists} listes analysées dans : {args.output}")
+    print(f"Débit : {n_lists / elapsed:,.0f} listes/s")
+
+
+if __name__ == "__main__":
+    main()
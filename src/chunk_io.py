@@ -0,0 +1,90 @@
+import os
+
+import pandas as pd
+
+ARROW_EXTENSIONS = (".arrow", ".feather")
+
+
+# ==========================
+# Lecture par blocs
+# ==========================
+def iter_chunks(path, chunk_size=100_000, columns=None):
+    """
+    Lit un fichier CSV, Parquet, Arrow/Feather (ou un dossier de shards
+    Parquet) par blocs de `chunk_size` lignes. Seul un bloc est en mémoire à
+    la fois (le fichier Arrow est memory-mappé).
+    """
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            if name.endswith(".parquet"):
+                yield from iter_chunks(os.path.join(path, name), chunk_size, columns)
+    elif path.endswith(ARROW_EXTENSIONS):
+        import pyarrow.feather as feather
+
+        table = feather.read_table(path, columns=columns, memory_map=True)
+        for batch in table.to_batches(max_chunksize=chunk_size):
+            yield batch.to_pandas()
+    elif path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size, usecols=columns)
+
+
+# ==========================
+# Écriture en flux
+# ==========================
+class ChunkWriter:
+    """
+    Ajoute des blocs (DataFrame) les uns après les autres dans un fichier CSV,
+    Parquet ou Arrow/Feather (IPC non compressé, lisible en memory-mapping).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._parquet_writer = None
+        self._arrow_writer = None
+        self._header_written = False
+
+    def write(self, df):
+        if self.path.endswith(ARROW_EXTENSIONS):
+            import pyarrow as pa
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._arrow_writer is None:
+                self._arrow_writer = pa.ipc.new_file(self.path, table.schema)
+            self._arrow_writer.write_table(table)
+        elif self.path.endswith(".parquet"):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+            self._parquet_writer.write_table(table)
+        else:
+            df.to_csv(
+                self.path,
+                mode="a" if self._header_written else "w",
+                header=not self._header_written,
+                index=False,
+                encoding="utf-8",
+            )
+            self._header_written = True
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+        if self._arrow_writer is not None:
+            self._arrow_writer.close()
+            self._arrow_writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,359 @@
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import joblib
+import numpy as np
+from sklearn.model_selection import train_test_split
+
+from features import CATEGORICAL_FEATURES, FEATURES, TARGET_COL
+from model_store import MODEL_PATH, get_model_holder
+from train_model import evaluate, load_data, split_data
+from tree_engine import ForestPredictor, export_forest
+
+COMPACT_PATH = os.path.join("models", "shopping_time_model.compact")
+
+# Tableaux de nœuds écrits en .npy (un fichier par tableau, lus en mmap)
+NODE_ARRAYS = ("feature", "threshold", "child_delta", "value", "roots")
+
+
+# ==========================
+# Réduction des types
+# ==========================
+def _float32_floor(threshold):
+    """
+    Plus grand float32 <= seuil. Les X sont en float32 : pour x float32,
+    `x > seuil` et `x > floor32(seuil)` donnent alors la même décision.
+    """
+    t32 = threshold.astype(np.float32)
+    too_high = t32.astype(np.float64) > threshold
+    t32[too_high] = np.nextafter(t32[too_high], np.float32(-np.inf))
+    return t32
+
+
+def _smallest_uint(max_value):
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if max_value <= np.iinfo(dtype).max:
+            return dtype
+    return np.uint64
+
+
+def compact_arrays(arrays):
+    """
+    Seuils et valeurs en float32, n° de feature en uint8, enfant gauche codé
+    par son écart au nœud courant (uint16 pour des arbres de profondeur 12),
+    racines en uint32.
+    """
+    n_nodes = len(arrays["feature"])
+    child_delta = arrays["child"] - np.arange(n_nodes)
+    return {
+        "feature": arrays["feature"].astype(_smallest_uint(arrays["feature"].max())),
+        "threshold": _float32_floor(arrays["threshold"]),
+        "child_delta": child_delta.astype(_smallest_uint(child_delta.max())),
+        "value": arrays["value"].astype(np.float32),
+        "roots": arrays["roots"].astype(_smallest_uint(n_nodes)),
+        "max_depth": arrays["max_depth"],
+        "scaler_mean": arrays["scaler_mean"],
+        "scaler_scale": arrays["scaler_scale"],
+        **{f"cat_{name}": arrays[f"cat_{name}"] for name in CATEGORICAL_FEATURES},
+    }
+
+
+def select_trees(arrays, keep):
+    """Sous-forêt ne gardant que les arbres d'indices `keep` (format export_forest)."""
+    roots = arrays["roots"]
+    ends = np.append(roots[1:], len(arrays["feature"]))
+    parts = {key: [] for key in ("feature", "threshold", "child", "value")}
+    new_roots = []
+    offset = 0
+    for t in keep:
+        start, end = roots[t], ends[t]
+        new_roots.append(offset)
+        parts["feature"].append(arrays["feature"][start:end])
+        parts["threshold"].append(arrays["threshold"][start:end])
+        parts["child"].append(arrays["child"][start:end] - start + offset)
+        parts["value"].append(arrays["value"][start:end])
+        offset += end - start
+
+    selected = {key: value for key, value in arrays.items() if key not in parts and key != "roots"}
+    selected.update({key: np.concatenate(chunks) for key, chunks in parts.items()})
+    selected["roots"] = np.asarray(new_roots, dtype=np.int64)
+    return selected
+
+
+# ==========================
+# Élagage glouton
+# ==========================
+def prune_trees(pipeline, X_select, y_select, X_stop, y_stop, budget=0.01):
+    """
+    Retire les arbres un par un : à chaque étape, celui dont le retrait
+    dégrade le moins la RMSE sur (X_select, y_select). On s'arrête dès que la
+    RMSE sur un second jeu (X_stop, y_stop) dépasserait RMSE_complète *
+    (1 + budget) : juger l'arrêt sur le jeu qui sert au choix sur-apprend
+    (on finit avec une poignée d'arbres). Retourne les indices gardés.
+    """
+    preprocessor = pipeline.named_steps["preprocessor"]
+    estimators = pipeline.named_steps["model"].estimators_
+
+    def per_tree(X):
+        Xt = preprocessor.transform(X)
+        return np.column_stack([tree.predict(Xt) for tree in estimators])
+
+    P_select, P_stop = per_tree(X_select), per_tree(X_stop)
+    y_sel = np.asarray(y_select, dtype=np.float64)
+    y_stp = np.asarray(y_stop, dtype=np.float64)
+
+    keep = list(range(len(estimators)))
+    total_select = P_select.sum(axis=1)
+    total_stop = P_stop.sum(axis=1)
+    limit = np.sqrt(np.mean((total_stop / len(keep) - y_stp) ** 2)) * (1 + budget)
+
+    while len(keep) > 1:
+        # RMSE de la forêt privée de chaque arbre restant (vectorisé)
+        candidates = (total_select[:, None] - P_select[:, keep]) / (len(keep) - 1)
+        rmse = np.sqrt(np.mean((candidates - y_sel[:, None]) ** 2, axis=0))
+        tree = keep[int(np.argmin(rmse))]
+
+        stop_pred = (total_stop - P_stop[:, tree]) / (len(keep) - 1)
+        if np.sqrt(np.mean((stop_pred - y_stp) ** 2)) > limit:
+            break
+        total_select -= P_select[:, tree]
+        total_stop -= P_stop[:, tree]
+        keep.remove(tree)
+    return keep
+
+
+# ==========================
+# Format répertoire + mmap
+# ==========================
+def _version_dirs(path):
+    parent, name = os.path.split(os.path.abspath(path))
+    return [
+        os.path.join(parent, entry)
+        for entry in os.listdir(parent)
+        if entry.startswith(name + ".v-") and os.path.isdir(os.path.join(parent, entry))
+    ]
+
+
+def save_compact(arrays, path=COMPACT_PATH, metadata=None):
+    """
+    Un .npy par tableau de nœuds + meta.json (profondeur, scaler, catégories),
+    dans un répertoire de version `<path>.v-XXXX`. `path` est un lien
+    symbolique vers la version courante, remplacé atomiquement : un lecteur
+    voit toujours un artefact complet. La version précédente est gardée (un
+    chargement en cours peut encore la lire), les plus anciennes sont
+    supprimées.
+    """
+    parent, name = os.path.split(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    version_dir = tempfile.mkdtemp(dir=parent, prefix=name + ".v-")
+    os.chmod(version_dir, 0o755)
+    for node_array in NODE_ARRAYS:
+        np.save(os.path.join(version_dir, f"{node_array}.npy"), arrays[node_array])
+    meta = {
+        "max_depth": int(arrays["max_depth"]),
+        "n_trees": int(len(arrays["roots"])),
+        "n_nodes": int(len(arrays["feature"])),
+        "scaler_mean": arrays["scaler_mean"].tolist(),
+        "scaler_scale": arrays["scaler_scale"].tolist(),
+        "categories": {cat: arrays[f"cat_{cat}"].tolist() for cat in CATEGORICAL_FEATURES},
+        **(metadata or {}),
+    }
+    with open(os.path.join(version_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+    previous = os.path.realpath(path) if os.path.islink(path) else None
+    if os.path.isdir(path) and previous is None:
+        # Ancien format (répertoire simple) : converti une fois en version
+        previous = tempfile.mkdtemp(dir=parent, prefix=name + ".v-")
+        os.replace(path, previous)
+
+    link_tmp = f"{path}.{os.getpid()}.tmp"
+    os.symlink(os.path.basename(version_dir), link_tmp)
+    os.replace(link_tmp, path)
+
+    keep = {os.path.realpath(version_dir), previous}
+    for old_dir in _version_dirs(path):
+        if os.path.realpath(old_dir) not in keep:
+            shutil.rmtree(old_dir, ignore_errors=True)
+    return path
+
+
+class CompactForestPredictor(ForestPredictor):
+    """ForestPredictor sur le format compact (tableaux memory-mappés)."""
+
+    def __init__(self, arrays, block_size=4096):
+        super().__init__({**arrays, "child": None}, block_size=block_size)
+        self.child_delta = arrays["child_delta"]
+
+    @classmethod
+    def load(cls, path=COMPACT_PATH):
+        # Lien résolu une fois : tous les fichiers viennent de la même version
+        path = os.path.realpath(path)
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+            for name in NODE_ARRAYS
+        }
+        arrays["max_depth"] = meta["max_depth"]
+        arrays["scaler_mean"] = meta["scaler_mean"]
+        arrays["scaler_scale"] = meta["scaler_scale"]
+        for name in CATEGORICAL_FEATURES:
+            arrays[f"cat_{name}"] = meta["categories"][name]
+        return cls(arrays)
+
+    def _predict_block(self, block):
+        n_rows, n_features = block.shape
+        flat = block.ravel()
+        row_offset = (np.arange(n_rows, dtype=np.int64) * n_features)[:, None]
+
+        node = np.broadcast_to(self.roots.astype(np.int64), (n_rows, len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            x = flat[row_offset + self.feature[node]]
+            node += self.child_delta[node] + (x > self.threshold[node])
+        return self.value[node].mean(axis=1, dtype=np.float64)
+
+
+# ==========================
+# Rapport
+# ==========================
+def _size_mb(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path)) / 2**20
+    return os.path.getsize(path) / 2**20
+
+
+def _median_load_ms(load, repeats=5):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        load()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)) * 1000
+
+
+def _split_three(X, y, random_state=0):
+    X_a, X_rest, y_a, y_rest = train_test_split(X, y, test_size=2 / 3, random_state=random_state)
+    X_b, X_c, y_b, y_c = train_test_split(X_rest, y_rest, test_size=0.5, random_state=random_state)
+    return (X_a, y_a), (X_b, y_b), (X_c, y_c)
+
+
+def build_report(pipeline, X_test, y_test, budgets=(0.005, 0.01, 0.02), tmp_dir=None):
+    """
+    Taille, temps de chargement et précision (sur X_test) de chaque option :
+    joblib, npz float64 (tree_engine), compact float32, compact élagué.
+    """
+    results = {}
+
+    joblib_path = os.path.join(tmp_dir, "model.joblib")
+    joblib.dump(pipeline, joblib_path)
+    results["joblib"] = {
+        "size_mb": _size_mb(joblib_path),
+        "load_ms": _median_load_ms(lambda: joblib.load(joblib_path, mmap_mode="r")),
+        "n_trees": len(pipeline.named_steps["model"].estimators_),
+        **evaluate(pipeline, X_test, y_test),
+    }
+
+    arrays = export_forest(pipeline)
+    npz_path = os.path.join(tmp_dir, "forest.npz")
+    ForestPredictor(arrays).save(npz_path)
+    results["npz float64"] = {
+        "size_mb": _size_mb(npz_path),
+        "load_ms": _median_load_ms(lambda: ForestPredictor.load(npz_path)),
+        "n_trees": len(arrays["roots"]),
+        **evaluate(ForestPredictor.load(npz_path), X_test, y_test),
+    }
+
+    # Jeu de test en trois : choix des arbres, critère d'arrêt, mesure
+    (X_select, y_select), (X_stop, y_stop), (X_hold, y_hold) = _split_three(X_test, y_test)
+    options = [("compact float32", arrays)]
+    for budget in budgets:
+        keep = prune_trees(pipeline, X_select, y_select, X_stop, y_stop, budget=budget)
+        options.append((f"élagué +{budget:.1%}", select_trees(arrays, keep)))
+
+    for label, option_arrays in options:
+        path = os.path.join(tmp_dir, label.replace(" ", "_").replace("%", ""))
+        save_compact(compact_arrays(option_arrays), path)
+        predictor = CompactForestPredictor.load(path)
+        results[label] = {
+            "size_mb": _size_mb(path),
+            "load_ms": _median_load_ms(lambda: CompactForestPredictor.load(path)),
+            "n_trees": len(predictor.roots),
+            **evaluate(predictor, X_test, y_test),
+            "holdout_rmse": evaluate(predictor, X_hold, y_hold)["rmse"],
+        }
+    results["joblib"]["holdout_rmse"] = evaluate(pipeline, X_hold, y_hold)["rmse"]
+    results["npz float64"]["holdout_rmse"] = results["joblib"]["holdout_rmse"]
+    return results
+
+
+def print_report(results):
+    header = f"{'option':16s} | {'arbres':>6s} | {'taille (Mo)':>11s} | {'chargement (ms)':>15s} | {'RMSE test':>9s} | {'RMSE hold-out':>13s}"
+    print(header)
+    print("-" * len(header))
+    for label, r in results.items():
+        print(
+            f"{label:16s} | {r['n_trees']:6d} | {r['size_mb']:11.2f} | {r['load_ms']:15.2f} | "
+            f"{r['rmse']:9.3f} | {r['holdout_rmse']:13.3f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export compact de la forêt (float32, élagage, mmap).")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_export = sub.add_parser("export", help="Écrit le modèle compact")
+    p_export.add_argument("--data", default="data/shopping_data.csv")
+    p_export.add_argument("--output", default=COMPACT_PATH)
+    p_export.add_argument(
+        "--budget",
+        type=float,
+        default=None,
+        help="Élagage : hausse de RMSE tolérée (0.01 = +1 %%) ; sans option, tous les arbres",
+    )
+
+    p_report = sub.add_parser("report", help="Compare taille, chargement et précision")
+    p_report.add_argument("--data", default="data/shopping_data.csv")
+    p_report.add_argument("--budgets", type=float, nargs="*", default=[0.005, 0.01, 0.02])
+    args = parser.parse_args()
+
+    pipeline, version = get_model_holder(MODEL_PATH).get_versioned()
+    df = load_data(args.data, columns=FEATURES + [TARGET_COL])
+    _, X_test, _, y_test = split_data(df)
+
+    if args.command == "report":
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            results = build_report(pipeline, X_test, y_test, budgets=args.budgets, tmp_dir=tmp_dir)
+        print(f"=== Formats du modèle ({len(X_test)} lignes de test) ===")
+        print_report(results)
+        return
+
+    arrays = export_forest(pipeline)
+    metadata = {"model_version": version}
+    X_eval, y_eval = X_test, y_test
+    if args.budget is not None:
+        # Comme build_report : choix, arrêt, puis RMSE sur un tiers jamais vu
+        (X_select, y_select), (X_stop, y_stop), (X_eval, y_eval) = _split_three(X_test, y_test)
+        keep = prune_trees(pipeline, X_select, y_select, X_stop, y_stop, budget=args.budget)
+        arrays = select_trees(arrays, keep)
+        metadata["pruning_budget"] = args.budget
+    save_compact(compact_arrays(arrays), args.output, metadata=metadata)
+
+    predictor = CompactForestPredictor.load(args.output)
+    print(f"Modèle compact écrit dans : {args.output}")
+    print(f"  {len(predictor.roots)} arbres, {_size_mb(args.output):.2f} Mo")
+    if args.budget is None:
+        print(f"  RMSE test : {evaluate(predictor, X_eval, y_eval)['rmse']:.3f}")
+    else:
+        print(
+            f"  RMSE hold-out ({len(X_eval)} lignes) : {evaluate(predictor, X_eval, y_eval)['rmse']:.3f} "
+            f"(forêt complète : {evaluate(pipeline, X_eval, y_eval)['rmse']:.3f})"
+        )
+
+
+if __name__ == "__main__":
+    main()
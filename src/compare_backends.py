@@ -0,0 +1,106 @@
+import argparse
+import os
+import tempfile
+import time
+
+import joblib
+import numpy as np
+
+from feature_encoder import predict_records, supports_pipeline
+from train_model import BACKENDS, create_pipeline, evaluate, load_data, split_data
+
+
+# ==========================
+# Mesures
+# ==========================
+def _median_latency(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def _artifact_size_mb(pipeline):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "model.joblib")
+        joblib.dump(pipeline, path)
+        return os.path.getsize(path) / 2**20
+
+
+def compare_backends(df, backends=BACKENDS, repeats=30):
+    """
+    Entraîne chaque backend sur le même découpage train/test et mesure :
+    temps d'entraînement, latence 1 ligne (`pipeline.predict` sur le même
+    DataFrame d'une ligne pour tous les backends), latence 1 ligne par le
+    chemin de service (`predict_records` : encodeur rapide pour la forêt,
+    pipeline complet sinon), latence d'un lot (jeu de test entier), taille du
+    modèle sur disque, RMSE/MAE/R².
+    """
+    X_train, X_test, y_train, y_test = split_data(df)
+    one_row = X_test.iloc[[0]]
+    record = [X_test.iloc[0].to_dict()]
+
+    report = {}
+    for backend in backends:
+        pipeline = create_pipeline(backend)
+
+        start = time.perf_counter()
+        pipeline.fit(X_train, y_train)
+        fit_time = time.perf_counter() - start
+
+        pipeline.predict(one_row)  # préchauffage
+        single = _median_latency(lambda: pipeline.predict(one_row), repeats)
+        predict_records(pipeline, record)
+        served = _median_latency(lambda: predict_records(pipeline, record), repeats)
+        batch = _median_latency(lambda: pipeline.predict(X_test), max(3, repeats // 10))
+
+        report[backend] = {
+            "fit_s": fit_time,
+            "single_row_ms": single * 1000,
+            "served_row_ms": served * 1000,
+            "fast_encoder": supports_pipeline(pipeline),
+            "batch_ms": batch * 1000,
+            "batch_rows": len(X_test),
+            "size_mb": _artifact_size_mb(pipeline),
+            **evaluate(pipeline, X_test, y_test),
+        }
+    return report
+
+
+def print_report(report):
+    print("=== Comparaison des backends (même découpage train/test) ===")
+    header = (
+        f"{'backend':8s} | {'fit (s)':>8s} | {'1 ligne (ms)':>12s} | {'service (ms)':>12s} | "
+        f"{'lot (ms)':>9s} | {'taille (Mo)':>11s} | {'RMSE':>6s} | {'MAE':>6s} | {'R²':>6s}"
+    )
+    print(header)
+    print("-" * len(header))
+    for backend, r in report.items():
+        served = f"{r['served_row_ms']:.2f}" + ("*" if r["fast_encoder"] else "")
+        print(
+            f"{backend:8s} | {r['fit_s']:8.2f} | {r['single_row_ms']:12.2f} | {served:>12s} | "
+            f"{r['batch_ms']:9.1f} | {r['size_mb']:11.2f} | {r['rmse']:6.2f} | "
+            f"{r['mae']:6.2f} | {r['r2']:6.3f}"
+        )
+    n_rows = next(iter(report.values()))["batch_rows"]
+    print(f"(1 ligne = pipeline.predict sur le même DataFrame d'une ligne ; "
+          f"service = predict_records depuis un dict, * = encodeur rapide ; "
+          f"lot = {n_rows} lignes du jeu de test)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare les backends de modèle.")
+    parser.add_argument("--data", default="data/shopping_data.csv")
+    parser.add_argument("--backends", nargs="*", default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument("--repeats", type=int, default=30)
+    args = parser.parse_args()
+
+    df = load_data(args.data)
+    report = compare_backends(df, backends=args.backends, repeats=args.repeats)
+    print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.model_selection import KFold
+
+from dataset_format import CATEGORIES
+from features import CATEGORICAL_FEATURES, FEATURES, TARGET_COL
+from train_model import BACKENDS, build_preprocessor, create_pipeline, load_data
+
+try:
+    import resource  # absent sous Windows
+except ImportError:
+    resource = None
+
+METRICS = ("rmse", "mae", "r2")
+
+
+# ==========================
+# Matrice prétraitée partagée
+# ==========================
+def write_shared_matrix(df, backend, folder, n_folds=5, block_size=100_000, random_state=42):
+    """
+    Prétraite le dataset une seule fois et l'écrit en .npy float32 (le type
+    utilisé en interne par les arbres) : X.npy, y.npy et fold.npy (n° de fold
+    de chaque ligne). Les workers les ouvrent en mmap, rien n'est picklé.
+
+    Le préprocesseur est ajusté sur tout le dataset : catégories du schéma et
+    StandardScaler, transformation monotone sans effet sur les découpes des
+    arbres, donc pas de fuite du jeu de test vers le modèle.
+    """
+    pipeline = create_pipeline(backend)
+    if backend == "forest":
+        pipeline.steps[0] = (
+            "preprocessor",
+            build_preprocessor(categories=[CATEGORIES[name] for name in CATEGORICAL_FEATURES]),
+        )
+    preprocessor = pipeline.named_steps["preprocessor"].fit(df[FEATURES])
+
+    n_rows = len(df)
+    X = None
+    for start in range(0, n_rows, block_size):
+        block = preprocessor.transform(df[FEATURES].iloc[start:start + block_size])
+        block = block.toarray() if hasattr(block, "toarray") else block
+        if X is None:
+            X = np.lib.format.open_memmap(
+                os.path.join(folder, "X.npy"), mode="w+", dtype=np.float32, shape=(n_rows, block.shape[1])
+            )
+        X[start:start + len(block)] = block
+    X.flush()
+    del X
+
+    np.save(os.path.join(folder, "y.npy"), df[TARGET_COL].to_numpy(dtype=np.float64))
+    fold = np.empty(n_rows, dtype=np.int8)
+    for i, (_, test_idx) in enumerate(KFold(n_folds, shuffle=True, random_state=random_state).split(fold)):
+        fold[test_idx] = i
+    np.save(os.path.join(folder, "fold.npy"), fold)
+
+
+# ==========================
+# Un fold (exécuté dans un processus du pool)
+# ==========================
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    # ru_maxrss : Ko sous Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_fold(folder, backend, fold_index):
+    """
+    Entraîne et évalue un fold à partir des tableaux memory-mappés. Pour la
+    forêt, les lignes de test reçoivent un poids nul au lieu d'être retirées :
+    sklearn ignore les poids nuls (c'est ainsi qu'il gère le bootstrap), la
+    matrice d'entraînement n'est donc jamais copiée.
+    """
+    X = np.load(os.path.join(folder, "X.npy"), mmap_mode="r")
+    y = np.load(os.path.join(folder, "y.npy"), mmap_mode="r")
+    test = np.load(os.path.join(folder, "fold.npy")) == fold_index
+
+    model = create_pipeline(backend).named_steps["model"]
+    if "n_jobs" in model.get_params():
+        # Le parallélisme est au niveau des folds
+        model.set_params(n_jobs=1)
+
+    start, cpu_start = time.perf_counter(), time.process_time()
+    if isinstance(model, RandomForestRegressor):
+        model.fit(X, y, sample_weight=(~test).astype(np.float64))
+    else:
+        model.fit(X[~test], y[~test])
+    fit_time, fit_cpu = time.perf_counter() - start, time.process_time() - cpu_start
+
+    y_test = np.asarray(y[test])
+    y_pred = model.predict(X[test])
+    return {
+        "fold": fold_index,
+        "rmse": float(np.sqrt(mean_squared_error(y_test, y_pred))),
+        "mae": float(mean_absolute_error(y_test, y_pred)),
+        "r2": float(r2_score(y_test, y_pred)),
+        "n_test": int(test.sum()),
+        "fit_time_s": fit_time,
+        "fit_cpu_s": fit_cpu,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+# ==========================
+# Validation croisée
+# ==========================
+def cross_validate(df, backend="forest", n_folds=5, workers=None, tmp_dir=None):
+    """
+    k-fold en parallèle : une matrice prétraitée sur disque, un processus par
+    fold (au plus `workers`). Retourne les résultats par fold et, pour chaque
+    métrique, moyenne et écart-type.
+    """
+    workers = workers or min(n_folds, os.cpu_count() or 1)
+    folder = tempfile.mkdtemp(prefix="shopping_cv_", dir=tmp_dir)
+    try:
+        start = time.perf_counter()
+        write_shared_matrix(df, backend, folder, n_folds=n_folds)
+        prep_time = time.perf_counter() - start
+        matrix_mb = os.path.getsize(os.path.join(folder, "X.npy")) / 1e6
+
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            folds = list(executor.map(run_fold, [folder] * n_folds, [backend] * n_folds, range(n_folds)))
+        wall_time = time.perf_counter() - start
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+    summary = {}
+    for name in METRICS:
+        values = [f[name] for f in folds]
+        summary[name] = {"mean": float(np.mean(values)), "std": float(np.std(values, ddof=1))}
+    return {
+        "folds": folds,
+        "summary": summary,
+        "workers": workers,
+        "prep_time_s": prep_time,
+        "wall_time_s": wall_time,
+        "matrix_mb": matrix_mb,
+    }
+
+
+def print_report(result):
+    print(f"{'fold':>4}{'RMSE':>8}{'MAE':>8}{'R²':>8}{'fit':>9}{'RSS max':>10}")
+    for f in result["folds"]:
+        rss = f"{f['peak_rss_mb']:.0f} Mo" if f["peak_rss_mb"] is not None else "-"
+        print(f"{f['fold']:>4}{f['rmse']:>8.2f}{f['mae']:>8.2f}{f['r2']:>8.3f}{f['fit_time_s']:>8.1f}s{rss:>10}")
+
+    summary = result["summary"]
+    print(
+        f"\nRMSE : {summary['rmse']['mean']:.2f} ± {summary['rmse']['std']:.2f} minutes\n"
+        f"MAE  : {summary['mae']['mean']:.2f} ± {summary['mae']['std']:.2f} minutes\n"
+        f"R²   : {summary['r2']['mean']:.3f} ± {summary['r2']['std']:.3f}"
+    )
+    # Temps CPU des fits / temps écoulé : nombre de cœurs réellement occupés
+    total_cpu = sum(f["fit_cpu_s"] for f in result["folds"])
+    print(
+        f"\nMatrice partagée : {result['matrix_mb']:.1f} Mo (prétraitement {result['prep_time_s']:.1f} s) ; "
+        f"{len(result['folds'])} folds sur {result['workers']} processus en {result['wall_time_s']:.1f} s "
+        f"(CPU des fits {total_cpu:.1f} s, parallélisme x{total_cpu / result['wall_time_s']:.1f})"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validation croisée k-fold en parallèle.")
+    parser.add_argument("--data", default="data/shopping_data.csv", help="Dataset (.csv, .parquet ou .arrow/.feather)")
+    parser.add_argument("--backend", choices=BACKENDS, default="forest")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=None, help="Processus (défaut : min(folds, cœurs))")
+    parser.add_argument("--tmp-dir", default=None, help="Dossier des tableaux memory-mappés (défaut : temp système)")
+    args = parser.parse_args()
+
+    df = load_data(args.data, columns=FEATURES + [TARGET_COL])
+    print(f"Validation croisée {args.folds} folds ({args.backend}, {len(df)} lignes)...")
+    result = cross_validate(df, backend=args.backend, n_folds=args.folds, workers=args.workers, tmp_dir=args.tmp_dir)
+    print_report(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from chunk_io import ARROW_EXTENSIONS, ChunkWriter, iter_chunks
+from features import ITEM_COLUMNS, SALES_EVENTS, HOLIDAY_EVENTS
+
+# ==========================
+# Schéma typé du dataset
+# ==========================
+CATEGORIES = {
+    "gender": ["femme", "homme"],
+    "profile": ["rapide", "normal", "flaneur", "methodique"],
+    "store_type": ["supermarche", "hypermarche", "centre_commercial", "boutique"],
+    "period": ["semaine", "weekend"],
+    "special_event": ["aucun"] + SALES_EVENTS + HOLIDAY_EVENTS,
+}
+
+SCHEMA = {
+    "age": "int8",
+    "gender": pd.CategoricalDtype(CATEGORIES["gender"]),
+    "profile": pd.CategoricalDtype(CATEGORIES["profile"]),
+    "store_type": pd.CategoricalDtype(CATEGORIES["store_type"]),
+    "period": pd.CategoricalDtype(CATEGORIES["period"]),
+    "special_event": pd.CategoricalDtype(CATEGORIES["special_event"]),
+    "day_of_week": "int8",
+    "hour": "int8",
+    "is_weekend": "int8",
+    "is_sales": "int8",
+    "is_holiday": "int8",
+    "total_items": "int16",
+    "nb_categories": "int8",
+    "has_shopping_list": "int8",
+    **{col: "int16" for col in ITEM_COLUMNS},
+    "shopping_time_min": "float32",
+}
+
+
+def apply_schema(df):
+    """
+    Convertit les colonnes connues d'un DataFrame vers les types du schéma.
+    Lève ValueError si une colonne catégorielle contient une valeur absente
+    du schéma (le cast la transformerait silencieusement en NaN) ou si une
+    colonne entière dépasse la plage de son type (le cast la replierait :
+    un âge de 200 deviendrait -56 en int8).
+    """
+    dtypes = {col: dtype for col, dtype in SCHEMA.items() if col in df.columns}
+    for col, dtype in dtypes.items():
+        if not isinstance(dtype, pd.CategoricalDtype):
+            if np.dtype(dtype).kind == "i" and len(df) and pd.api.types.is_numeric_dtype(df[col]):
+                info = np.iinfo(dtype)
+                low, high = df[col].min(), df[col].max()
+                if low < info.min or high > info.max:
+                    raise ValueError(
+                        f"Colonne {col} : valeurs [{low}, {high}] hors de la plage "
+                        f"{dtype} [{info.min}, {info.max}]"
+                    )
+            continue
+        unknown = df[col].notna() & ~df[col].isin(dtype.categories)
+        if unknown.any():
+            bad = sorted(map(str, df.loc[unknown, col].unique()))
+            raise ValueError(
+                f"Colonne {col} : valeur(s) hors schéma {bad[:10]} "
+                f"(attendu : {', '.join(CATEGORIES[col])})"
+            )
+    return df.astype(dtypes)
+
+
+def is_arrow_path(path):
+    return path.endswith(ARROW_EXTENSIONS)
+
+
+# ==========================
+# Conversion et lecture
+# ==========================
+def convert_csv(csv_path, output_path, chunk_size=1_000_000):
+    """
+    Convertit un CSV (ou Parquet) en fichier Arrow IPC non compressé
+    (format Feather v2), bloc par bloc, avec les types du schéma.
+    """
+    n_rows = 0
+    with ChunkWriter(output_path) as writer:
+        for chunk in iter_chunks(csv_path, chunk_size=chunk_size):
+            writer.write(apply_schema(chunk))
+            n_rows += len(chunk)
+    return n_rows
+
+
+def read_dataset(path, columns=None, chunk_size=200_000):
+    """
+    Lit le dataset :
+    - .arrow/.feather : memory-mapping, seules les colonnes demandées sont lues ;
+    - .parquet ou dossier de shards Parquet (generate_data.py --shards) :
+      lecture des colonnes demandées ;
+    - sinon CSV, typé avec le schéma.
+    """
+    if is_arrow_path(path):
+        import pyarrow.feather as feather
+
+        table = feather.read_table(path, columns=columns, memory_map=True)
+        return table.to_pandas(split_blocks=True, self_destruct=True)
+
+    if path.endswith(".parquet") or os.path.isdir(path):
+        return apply_schema(pd.read_parquet(path, columns=columns))
+
+    # Catégories lues telles quelles, entiers en int64 : apply_schema vérifie
+    # les deux avant de les réduire (read_csv replierait un int8 hors plage).
+    # Lecture par blocs : un seul bloc en int64 à la fois.
+    dtype = {}
+    for col, col_dtype in SCHEMA.items():
+        if columns is not None and col not in columns:
+            continue
+        if isinstance(col_dtype, pd.CategoricalDtype):
+            dtype[col] = "category"
+        elif np.dtype(col_dtype).kind != "i":
+            dtype[col] = col_dtype
+    reader = pd.read_csv(path, usecols=columns, dtype=dtype, chunksize=chunk_size)
+    return pd.concat([apply_schema(chunk) for chunk in reader], ignore_index=True)
+
+
+# ==========================
+# Benchmark CSV vs Arrow
+# ==========================
+_MEASURE = """
+import resource, sys, time
+sys.path.insert(0, {src!r})
+import pandas as pd
+from dataset_format import read_dataset
+base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+df = {reader}
+elapsed = time.perf_counter() - start
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(elapsed, (peak - base) / 1024, df.memory_usage(deep=True).sum() / 2**20)
+"""
+
+
+def _measure(reader):
+    # Chaque lecture dans un processus neuf pour mesurer la mémoire résidente
+    src = os.path.dirname(os.path.abspath(__file__))
+    code = _MEASURE.format(src=src, reader=reader)
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    elapsed, rss_mb, frame_mb = map(float, out.stdout.split())
+    return elapsed, rss_mb, frame_mb
+
+
+def benchmark(csv_path, arrow_path, columns=None):
+    cases = [
+        ("CSV (pd.read_csv brut)", f"pd.read_csv({csv_path!r}, usecols={columns!r})"),
+        ("CSV typé", f"read_dataset({csv_path!r}, columns={columns!r})"),
+        ("Arrow (mmap)", f"read_dataset({arrow_path!r}, columns={columns!r})"),
+    ]
+    print(f"=== Chargement du dataset (colonnes : {columns or 'toutes'}) ===")
+    for label, reader in cases:
+        elapsed, rss_mb, frame_mb = _measure(reader)
+        print(
+            f"  {label:24s} : {elapsed:6.2f} s | RSS +{rss_mb:7.1f} Mo | "
+            f"DataFrame {frame_mb:7.1f} Mo"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Format binaire typé du dataset.")
+    parser.add_argument("command", choices=["convert", "benchmark"])
+    parser.add_argument("--input", default=os.path.join("data", "shopping_data.csv"))
+    parser.add_argument("--output", default=os.path.join("data", "shopping_data.arrow"))
+    parser.add_argument("--chunk-size", type=int, default=1_000_000)
+    parser.add_argument("--columns", nargs="*", default=None, help="Projection (benchmark)")
+    args = parser.parse_args()
+
+    if args.command == "convert":
+        start = time.perf_counter()
+        n_rows = convert_csv(args.input, args.output, chunk_size=args.chunk_size)
+        elapsed = time.perf_counter() - start
+        size_mb = os.path.getsize(args.output) / 2**20
+        print(f"{n_rows} lignes converties dans : {args.output} ({size_mb:.1f} Mo, {elapsed:.1f} s)")
+    else:
+        benchmark(args.input, args.output, columns=args.columns)
+
+
+if __name__ == "__main__":
+    main()
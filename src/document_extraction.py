@@ -0,0 +1,245 @@
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+# Changer cette version invalide les textes déjà en cache
+EXTRACTOR_VERSION = "1"
+CACHE_DIR = os.path.join(".cache", "extraction")
+OCR_LANG = "fra+eng"  # français + anglais
+TESSERACT_WINDOWS_PATH = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+
+SUPPORTED_EXTENSIONS = (".txt", ".csv", ".pdf", ".png", ".jpg", ".jpeg")
+N_WORKERS = min(4, os.cpu_count() or 1)
+
+
+# ==========================
+# Travail exécuté dans les processus du pool
+# ==========================
+def setup_tesseract_if_needed():
+    """Configure le chemin de Tesseract si nécessaire (Windows)."""
+    import pytesseract
+
+    if os.name == "nt" and os.path.exists(TESSERACT_WINDOWS_PATH):
+        pytesseract.pytesseract.tesseract_cmd = TESSERACT_WINDOWS_PATH
+
+
+def ocr_image(data, lang=OCR_LANG):
+    from PIL import Image
+    import pytesseract
+
+    setup_tesseract_if_needed()
+    with Image.open(io.BytesIO(data)) as image:
+        return pytesseract.image_to_string(image, lang=lang)
+
+
+def pdf_page_count(data):
+    import pdfplumber
+
+    with pdfplumber.open(io.BytesIO(data)) as pdf:
+        return len(pdf.pages)
+
+
+def pdf_pages_text(data, start, stop):
+    """Texte des pages [start, stop) d'un PDF."""
+    import pdfplumber
+
+    with pdfplumber.open(io.BytesIO(data)) as pdf:
+        return "".join("\n" + (pdf.pages[i].extract_text() or "") for i in range(start, stop))
+
+
+def csv_text(data):
+    import pandas as pd
+
+    df = pd.read_csv(io.BytesIO(data))
+    # On prend toutes les colonnes et toutes les lignes, concaténées
+    return " ".join(df.astype(str).values.ravel().tolist())
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Pool de processus partagé (créé à la première extraction lourde)."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(max_workers=N_WORKERS)
+    return _pool
+
+
+# ==========================
+# Cache par hash du contenu
+# ==========================
+def content_key(filename, data):
+    """Hash SHA-256 du contenu (+ extension et version de l'extracteur)."""
+    h = hashlib.sha256()
+    h.update(f"{EXTRACTOR_VERSION}:{os.path.splitext(filename.lower())[1]}:".encode("utf-8"))
+    h.update(data)
+    return h.hexdigest()
+
+
+class ExtractionCache:
+    """
+    Textes extraits indexés par hash du contenu : LRU en mémoire
+    (`max_entries`) devant un répertoire sur disque, partagé par les sessions
+    et conservé entre deux lancements de l'app.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_entries=256):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.txt") if self.cache_dir else None
+
+    def get(self, key):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+        path = self._path(key)
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                text = f.read()
+            self._remember(key, text)
+            return text
+        return None
+
+    def put(self, key, text):
+        self._remember(key, text)
+        path = self._path(key)
+        if path:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+
+    def _remember(self, key, text):
+        with self._lock:
+            self._memory[key] = text
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+
+_cache = ExtractionCache()
+
+
+# ==========================
+# Tâches d'extraction
+# ==========================
+class ExtractionJob:
+    """
+    Extraction en cours : une liste de futures dont les textes sont
+    concaténés dans l'ordre. `progress()` ne bloque pas, `result()` attend la
+    fin puis met le texte en cache.
+    """
+
+    def __init__(self, key, futures=(), text=None, cache=None, cached=False):
+        self.key = key
+        self.futures = list(futures)
+        self.cached = cached
+        self._text = text
+        self._cache = cache
+
+    def done(self):
+        return self._text is not None or all(f.done() for f in self.futures)
+
+    def progress(self):
+        if self._text is not None or not self.futures:
+            return 1.0
+        return sum(f.done() for f in self.futures) / len(self.futures)
+
+    def result(self, timeout=None):
+        if self._text is None:
+            try:
+                text = "".join(f.result(timeout=timeout) for f in self.futures)
+            except FutureTimeoutError:
+                # Pas encore fini : le job reste en cours
+                raise
+            except Exception:
+                # Échec : le prochain envoi du fichier relancera l'extraction
+                with _jobs_lock:
+                    _jobs.pop(self.key, None)
+                raise
+            if self._cache is not None:
+                self._cache.put(self.key, text)
+            with _jobs_lock:
+                _jobs.pop(self.key, None)
+            self._text = text
+        return self._text
+
+
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+
+def _pdf_ranges(n_pages, n_workers):
+    # Quelques pages par tâche : parallèle, avec une progression assez fine
+    step = max(1, n_pages // (n_workers * 4))
+    return [(start, min(start + step, n_pages)) for start in range(0, n_pages, step)]
+
+
+def start_extraction(filename, data, cache=None):
+    """
+    Lance l'extraction du texte d'un fichier (octets) et retourne un
+    ExtractionJob. Contenu déjà vu : job terminé immédiatement (cache). Même
+    contenu déjà en cours (autre session, rerun) : le même job est renvoyé.
+    TXT/CSV sont lus sur place ; OCR et pages PDF partent dans le pool.
+    """
+    cache = _cache if cache is None else cache
+    name = filename.lower()
+    if not name.endswith(SUPPORTED_EXTENSIONS):
+        raise ValueError("Format de fichier non supporté. Utilise txt, csv, pdf, png, jpg ou jpeg.")
+
+    key = content_key(name, data)
+    text = cache.get(key)
+    if text is not None:
+        return ExtractionJob(key, text=text, cached=True)
+
+    with _jobs_lock:
+        job = _jobs.get(key)
+    if job is not None:
+        return job
+
+    # Lecture et comptage des pages hors du verrou : une grosse extraction ne
+    # bloque pas les autres sessions
+    if name.endswith(".txt"):
+        text = data.decode("utf-8", errors="ignore")
+    elif name.endswith(".csv"):
+        text = csv_text(data)
+    if text is not None:
+        cache.put(key, text)
+        return ExtractionJob(key, text=text)
+    n_pages = pdf_page_count(data) if name.endswith(".pdf") else None
+
+    with _jobs_lock:
+        # Même contenu lancé entre-temps par une autre session
+        job = _jobs.get(key)
+        if job is not None:
+            return job
+        pool = get_pool()
+        if n_pages is not None:
+            futures = [
+                pool.submit(pdf_pages_text, data, start, stop)
+                for start, stop in _pdf_ranges(n_pages, N_WORKERS)
+            ]
+        else:
+            futures = [pool.submit(ocr_image, data)]
+        job = ExtractionJob(key, futures, cache=cache)
+        _jobs[key] = job
+        return job
+
+
+def extract_text(filename, data):
+    """Version bloquante de start_extraction."""
+    return start_extraction(filename, data).result()
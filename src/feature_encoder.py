@@ -0,0 +1,198 @@
+import weakref
+
+import numpy as np
+
+import instrumentation as metrics
+
+from features import (
+    NUMERIC_FEATURES,
+    BINARY_FEATURES,
+    CATEGORICAL_FEATURES,
+    ITEM_COLUMNS,
+    SALES_EVENTS,
+    HOLIDAY_EVENTS,
+)
+
+
+def _scalar(value):
+    # Les dicts du projet contiennent des listes à un élément : {"age": [30], ...}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return value[0]
+    return value
+
+
+# ==========================
+# Encodeur dict -> vecteur
+# ==========================
+class FeatureEncoder:
+    """
+    Reproduit le ColumnTransformer entraîné (StandardScaler + passthrough +
+    OneHotEncoder) sans DataFrame : moyennes/écarts-types et position de chaque
+    catégorie dans le one-hot sont précalculés, un enregistrement est écrit
+    directement dans un tableau float préalloué.
+    """
+
+    def __init__(self, scaler_mean, scaler_scale, categories):
+        self.scaler_mean = np.asarray(scaler_mean, dtype=np.float64)
+        self.scaler_scale = np.asarray(scaler_scale, dtype=np.float64)
+        self.categories = [list(map(str, cats)) for cats in categories]
+
+        self.n_numeric = len(NUMERIC_FEATURES)
+        self.n_binary = len(BINARY_FEATURES)
+
+        # Colonne de sortie de chaque (feature catégorielle, valeur)
+        self.slots = {}
+        col = self.n_numeric + self.n_binary
+        for name, cats in zip(CATEGORICAL_FEATURES, self.categories):
+            self.slots[name] = {value: col + i for i, value in enumerate(cats)}
+            col += len(cats)
+        self.width = col
+
+        self._mean = self.scaler_mean.tolist()
+        self._scale = self.scaler_scale.tolist()
+
+    @classmethod
+    def from_preprocessor(cls, preprocessor):
+        scaler = preprocessor.named_transformers_["num"].named_steps["scaler"]
+        encoder = preprocessor.named_transformers_["cat"]
+        return cls(scaler.mean_, scaler.scale_, encoder.categories_)
+
+    # --------------------------
+    # Un enregistrement
+    # --------------------------
+    def encode(self, record, out=None):
+        """
+        Encode un enregistrement (dict de valeurs ou de listes à un élément)
+        dans `out` (tableau 1D de taille `width`, alloué si absent).
+        Les variables dérivées manquantes (total_items, period...) sont calculées.
+        """
+        if out is None:
+            out = np.zeros(self.width, dtype=np.float64)
+        else:
+            out[:] = 0.0
+
+        values = {key: _scalar(value) for key, value in record.items()}
+        _complete_derived(values)
+
+        for i, name in enumerate(NUMERIC_FEATURES):
+            out[i] = (float(values[name]) - self._mean[i]) / self._scale[i]
+        for i, name in enumerate(BINARY_FEATURES):
+            out[self.n_numeric + i] = float(values[name])
+        for name, slots in self.slots.items():
+            col = slots.get(str(values[name]))
+            if col is not None:  # catégorie inconnue : ignorée comme handle_unknown="ignore"
+                out[col] = 1.0
+        return out
+
+    # --------------------------
+    # Lots
+    # --------------------------
+    def encode_batch(self, records, dtype=np.float64):
+        """Encode une liste d'enregistrements dans une seule matrice."""
+        X = np.zeros((len(records), self.width), dtype=dtype)
+        row = np.zeros(self.width, dtype=np.float64)
+        for i, record in enumerate(records):
+            X[i] = self.encode(record, out=row)
+        return X
+
+    def encode_frame(self, df, dtype=np.float64):
+        """Encode un DataFrame complet (colonnes FEATURES) de façon vectorisée."""
+        n = len(df)
+        X = np.zeros((n, self.width), dtype=dtype)
+
+        num = df[NUMERIC_FEATURES].to_numpy(dtype=np.float64)
+        X[:, :self.n_numeric] = (num - self.scaler_mean) / self.scaler_scale
+        X[:, self.n_numeric:self.n_numeric + self.n_binary] = df[BINARY_FEATURES].to_numpy(
+            dtype=np.float64
+        )
+
+        rows = np.arange(n)
+        for name, slots in self.slots.items():
+            cols = np.fromiter(
+                (slots.get(str(value), -1) for value in df[name].to_numpy()),
+                dtype=np.int64,
+                count=n,
+            )
+            known = cols >= 0
+            X[rows[known], cols[known]] = 1.0
+        return X
+
+
+def _complete_derived(values):
+    """Calcule en place les variables dérivées absentes d'un enregistrement."""
+    if "total_items" not in values:
+        values["total_items"] = sum(int(values[c]) for c in ITEM_COLUMNS)
+    if "nb_categories" not in values:
+        values["nb_categories"] = sum(int(values[c]) > 0 for c in ITEM_COLUMNS)
+    if "period" not in values:
+        values["period"] = "semaine" if int(values["day_of_week"]) < 5 else "weekend"
+    if "is_weekend" not in values:
+        values["is_weekend"] = 1 if values["period"] == "weekend" else 0
+    if "is_sales" not in values:
+        values["is_sales"] = 1 if values["special_event"] in SALES_EVENTS else 0
+    if "is_holiday" not in values:
+        values["is_holiday"] = 1 if values["special_event"] in HOLIDAY_EVENTS else 0
+
+
+def complete_record(record):
+    """Copie scalaire d'un enregistrement, variables dérivées comprises."""
+    values = {key: _scalar(value) for key, value in record.items()}
+    _complete_derived(values)
+    return values
+
+
+_encoders = weakref.WeakKeyDictionary()
+
+
+def get_encoder(pipeline):
+    """Encodeur associé à un pipeline entraîné (construit une seule fois par modèle)."""
+    encoder = _encoders.get(pipeline)
+    if encoder is None:
+        encoder = FeatureEncoder.from_preprocessor(pipeline.named_steps["preprocessor"])
+        _encoders[pipeline] = encoder
+    return encoder
+
+
+def supports_pipeline(pipeline):
+    """Vrai si le préprocesseur est celui du backend forêt (scaler + one-hot)."""
+    from sklearn.preprocessing import OneHotEncoder
+
+    preprocessor = pipeline.named_steps["preprocessor"]
+    return isinstance(preprocessor.named_transformers_.get("cat"), OneHotEncoder)
+
+
+def predict_records(pipeline, records):
+    """
+    Prédit une liste d'enregistrements en contournant DataFrame et
+    ColumnTransformer : encodage direct puis appel du modèle seul.
+    Les autres backends (hgb) passent par le pipeline complet.
+    """
+    metrics.increment("shopping_predicted_rows_total", len(records))
+    if not supports_pipeline(pipeline):
+        import pandas as pd
+
+        with metrics.timer("shopping_predict_stage_seconds", stage="encode"):
+            X = pd.DataFrame([complete_record(record) for record in records])
+        with metrics.timer("shopping_predict_stage_seconds", stage="model"):
+            return pipeline.predict(X)
+
+    with metrics.timer("shopping_predict_stage_seconds", stage="encode"):
+        X = get_encoder(pipeline).encode_batch(records)
+    with metrics.timer("shopping_predict_stage_seconds", stage="model"):
+        return pipeline.named_steps["model"].predict(X)
+
+
+def predict_frame(pipeline, X):
+    """
+    Prédit un DataFrame de features (colonnes FEATURES) : encodage vectorisé
+    puis modèle seul pour la forêt, pipeline complet pour les autres backends.
+    """
+    metrics.increment("shopping_predicted_rows_total", len(X))
+    if not supports_pipeline(pipeline):
+        with metrics.timer("shopping_predict_stage_seconds", stage="model"):
+            return pipeline.predict(X)
+
+    with metrics.timer("shopping_predict_stage_seconds", stage="encode"):
+        Xt = get_encoder(pipeline).encode_frame(X)
+    with metrics.timer("shopping_predict_stage_seconds", stage="model"):
+        return pipeline.named_steps["model"].predict(Xt)
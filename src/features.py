@@ -0,0 +1,89 @@
+import numpy as np
+
+# ==========================
+# Colonnes utilisées par le modèle
+# ==========================
+TARGET_COL = "shopping_time_min"
+
+NUMERIC_FEATURES = [
+    "age",
+    "hour",
+    "day_of_week",
+    "total_items",
+    "nb_categories",
+    "items_alimentaire",
+    "items_vetements",
+    "items_electronique",
+    "items_maison",
+    "items_beaute",
+    "items_sport",
+    "items_librairie",
+]
+
+BINARY_FEATURES = [
+    "is_weekend",
+    "is_sales",
+    "is_holiday",
+    "has_shopping_list",
+]
+
+CATEGORICAL_FEATURES = [
+    "gender",
+    "profile",
+    "store_type",
+    "period",
+    "special_event",
+]
+
+FEATURES = NUMERIC_FEATURES + BINARY_FEATURES + CATEGORICAL_FEATURES
+
+ITEM_COLUMNS = [
+    "items_alimentaire",
+    "items_vetements",
+    "items_electronique",
+    "items_maison",
+    "items_beaute",
+    "items_sport",
+    "items_librairie",
+]
+
+SALES_EVENTS = ["soldes_ete", "soldes_hiver", "black_friday"]
+HOLIDAY_EVENTS = ["noel", "paques", "rentree", "fin_annee"]
+
+# Colonnes "brutes" d'une visite : tout le reste s'en déduit
+RAW_VISIT_COLUMNS = [
+    "age",
+    "gender",
+    "profile",
+    "store_type",
+    "day_of_week",
+    "hour",
+    "special_event",
+    "has_shopping_list",
+] + ITEM_COLUMNS
+
+
+# ==========================
+# Variables dérivées (vectorisé)
+# ==========================
+def add_derived_features(df):
+    """
+    Calcule period, is_weekend, is_sales, is_holiday, total_items et
+    nb_categories à partir des colonnes brutes, sur tout le DataFrame d'un coup.
+    """
+    missing = [c for c in RAW_VISIT_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Colonnes manquantes dans les visites : {missing}")
+
+    day_of_week = df["day_of_week"].to_numpy()
+    special_event = df["special_event"].to_numpy()
+    items = df[ITEM_COLUMNS].to_numpy()
+
+    df = df.copy()
+    df["period"] = np.where(day_of_week < 5, "semaine", "weekend")
+    df["is_weekend"] = (day_of_week >= 5).astype(int)
+    df["is_sales"] = np.isin(special_event, SALES_EVENTS).astype(int)
+    df["is_holiday"] = np.isin(special_event, HOLIDAY_EVENTS).astype(int)
+    df["total_items"] = items.sum(axis=1)
+    df["nb_categories"] = (items > 0).sum(axis=1)
+    return df
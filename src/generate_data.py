@@ -1,20 +1,98 @@
+import argparse
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 import pandas as pd
 
+from chunk_io import ChunkWriter
+
+
+# Taille des blocs logiques : chaque bloc a son propre flux aléatoire, la
+# taille des blocs écrits (`chunk_size`) ne change donc pas les données
+BLOCK_SIZE = 100_000
+
+
 def generate_shopping_dataset(n_samples: int = 5000, random_state: int = 42) -> pd.DataFrame:
-    np.random.seed(random_state)
+    item_time_factor, (shard_seed,) = _spawn_seeds(random_state, n_shards=1)
+    chunks = list(_iter_shard_chunks(n_samples, shard_seed, item_time_factor, chunk_size=n_samples))
+    if not chunks:
+        # n_samples = 0 : DataFrame vide, avec les colonnes et les types habituels
+        return _generate_chunk(0, _block_rng(shard_seed, 0), item_time_factor)
+    return pd.concat(chunks, ignore_index=True)
+
+
+# ==========================
+# Graines : un flux indépendant par shard
+# ==========================
+def _spawn_seeds(random_state, n_shards):
+    """
+    Dérive de la graine un flux pour le facteur minutes/article (commun à tout
+    le dataset) et un flux indépendant par shard (SeedSequence.spawn).
+    Pour une graine et un nombre de shards donnés, le résultat ne dépend pas
+    de l'ordre ni du processus dans lequel les shards sont générés.
+    """
+    factor_seed, *shard_seeds = np.random.SeedSequence(random_state).spawn(n_shards + 1)
+    item_time_factor = np.random.default_rng(factor_seed).uniform(1.2, 2.0)
+    return item_time_factor, shard_seeds
+
+
+def _block_rng(shard_seed, block_index):
+    """
+    Flux du bloc logique `block_index` d'un shard. Le bloc 0 garde le flux du
+    shard lui-même (un dataset d'un seul bloc est inchangé), les suivants
+    dérivent une graine enfant comme SeedSequence.spawn.
+    """
+    if block_index == 0:
+        return np.random.default_rng(shard_seed)
+    return np.random.default_rng(
+        np.random.SeedSequence(shard_seed.entropy, spawn_key=shard_seed.spawn_key + (block_index,))
+    )
+
+
+def _iter_shard_chunks(n_samples, shard_seed, item_time_factor, chunk_size):
+    """
+    Génère un shard par blocs logiques de BLOCK_SIZE lignes et les regroupe en
+    DataFrames de `chunk_size` lignes (le dernier plus court). Mémoire bornée
+    par chunk_size + BLOCK_SIZE lignes.
+    """
+    buffer, n_buffered = [], 0
+    for block_index, start in enumerate(range(0, n_samples, BLOCK_SIZE)):
+        block = _generate_chunk(
+            min(BLOCK_SIZE, n_samples - start), _block_rng(shard_seed, block_index), item_time_factor
+        )
+        buffer.append(block)
+        n_buffered += len(block)
+        while n_buffered >= chunk_size:
+            merged = pd.concat(buffer, ignore_index=True) if len(buffer) > 1 else buffer[0]
+            yield merged.iloc[:chunk_size].reset_index(drop=True)
+            rest = merged.iloc[chunk_size:]
+            buffer, n_buffered = ([rest] if len(rest) else []), len(rest)
+    if n_buffered:
+        yield pd.concat(buffer, ignore_index=True)
+
+
+def _shard_sizes(n_samples, n_shards):
+    base, extra = divmod(n_samples, n_shards)
+    return [base + (1 if i < extra else 0) for i in range(n_shards)]
+
 
+def _generate_chunk(n_samples, rng, item_time_factor):
+    """
+    Génère `n_samples` lignes en tirant dans `rng` (np.random.Generator).
+    `item_time_factor` (minutes par article) est le même pour tout le dataset.
+    """
     # Profils de clients
     profiles = ["rapide", "normal", "flaneur", "methodique"]
     store_types = ["supermarche", "hypermarche", "centre_commercial", "boutique"]
 
     # Sexe / genre
     genders = ["femme", "homme"]
-    gender = np.random.choice(genders, size=n_samples, p=[0.5, 0.5])
+    gender = rng.choice(genders, size=n_samples, p=[0.5, 0.5])
 
     # Jours de la semaine (0 = lundi, 6 = dimanche)
-    day_of_week = np.random.randint(0, 7, size=n_samples)
+    day_of_week = rng.integers(0, 7, size=n_samples)
 
     # Période semaine/weekend (0-4 semaine, 5-6 weekend)
     period = np.where(day_of_week < 5, "semaine", "weekend")
@@ -30,18 +108,18 @@ def generate_shopping_dataset(n_samples: int = 5000, random_state: int = 42) ->
         "black_friday",
         "fin_annee",
     ]
-    special_event = np.random.choice(
+    special_event = rng.choice(
         special_events,
         size=n_samples,
         p=[0.55, 0.08, 0.07, 0.08, 0.05, 0.07, 0.05, 0.05],
     )
 
-    age = np.random.randint(18, 70, size=n_samples)
-    profile = np.random.choice(profiles, size=n_samples, p=[0.2, 0.5, 0.2, 0.1])
-    store_type = np.random.choice(store_types, size=n_samples, p=[0.4, 0.3, 0.2, 0.1])
+    age = rng.integers(18, 70, size=n_samples)
+    profile = rng.choice(profiles, size=n_samples, p=[0.2, 0.5, 0.2, 0.1])
+    store_type = rng.choice(store_types, size=n_samples, p=[0.4, 0.3, 0.2, 0.1])
 
     # Heure
-    hour = np.random.randint(9, 21, size=n_samples)  # 9h–20h
+    hour = rng.integers(9, 21, size=n_samples)  # 9h–20h
 
     # Flags à partir de period + special_event
     is_weekend = np.where(period == "weekend", 1, 0)
@@ -53,13 +131,13 @@ def generate_shopping_dataset(n_samples: int = 5000, random_state: int = 42) ->
     ).astype(int)
 
     # Liste de courses (par catégories)
-    items_alimentaire = np.random.poisson(lam=10, size=n_samples).clip(0)
-    items_vetements = np.random.poisson(lam=3, size=n_samples).clip(0)
-    items_electronique = np.random.poisson(lam=1, size=n_samples).clip(0)
-    items_maison = np.random.poisson(lam=2, size=n_samples).clip(0)
-    items_beaute = np.random.poisson(lam=2, size=n_samples).clip(0)
-    items_sport = np.random.poisson(lam=1, size=n_samples).clip(0)
-    items_librairie = np.random.poisson(lam=1, size=n_samples).clip(0)
+    items_alimentaire = rng.poisson(lam=10, size=n_samples).clip(0)
+    items_vetements = rng.poisson(lam=3, size=n_samples).clip(0)
+    items_electronique = rng.poisson(lam=1, size=n_samples).clip(0)
+    items_maison = rng.poisson(lam=2, size=n_samples).clip(0)
+    items_beaute = rng.poisson(lam=2, size=n_samples).clip(0)
+    items_sport = rng.poisson(lam=1, size=n_samples).clip(0)
+    items_librairie = rng.poisson(lam=1, size=n_samples).clip(0)
 
     total_items = (
         items_alimentaire
@@ -81,14 +159,14 @@ def generate_shopping_dataset(n_samples: int = 5000, random_state: int = 42) ->
         + (items_librairie > 0).astype(int)
     )
 
-    has_shopping_list = np.random.binomial(1, 0.6, size=n_samples)
+    has_shopping_list = rng.binomial(1, 0.6, size=n_samples)
 
     # Base time en minutes (vecteur)
     base_time = 10.0
     time = np.full(n_samples, base_time, dtype=float)
 
     # Effet nombre d'articles + diversité
-    time += total_items * np.random.uniform(1.2, 2.0)
+    time += total_items * item_time_factor
     time += nb_categories * 3.0
 
     # Effet weekend / soldes / fêtes
@@ -141,7 +219,7 @@ def generate_shopping_dataset(n_samples: int = 5000, random_state: int = 42) ->
     # mais tu peux le faire si tu veux simuler une différence moyenne.
 
     # Bruit aléatoire
-    noise = np.random.normal(loc=0.0, scale=8.0, size=n_samples)
+    noise = rng.normal(loc=0.0, scale=8.0, size=n_samples)
     time = time + noise
 
     # Plancher à 5 minutes
@@ -176,15 +254,128 @@ def generate_shopping_dataset(n_samples: int = 5000, random_state: int = 42) ->
     return df
 
 
+def _write_shard(output_path, n_samples, shard_seed, item_time_factor, chunk_size):
+    """Génère un shard bloc par bloc et l'ajoute à `output_path`."""
+    n_written = 0
+    with ChunkWriter(output_path) as writer:
+        for chunk in _iter_shard_chunks(n_samples, shard_seed, item_time_factor, chunk_size):
+            writer.write(chunk)
+            n_written += len(chunk)
+    return n_written
+
+
+def generate_dataset_to_file(
+    output_path, n_samples, chunk_size=1_000_000, random_state=42, n_shards=1, verbose=True
+):
+    """
+    Génère le dataset bloc par bloc dans un seul fichier (Parquet : un row
+    group par bloc ; CSV : ajout en fin de fichier). La mémoire utilisée
+    dépend de `chunk_size`, pas de `n_samples`. Le contenu ne dépend que de
+    la graine et du nombre de shards (pas de `chunk_size`) : il est identique
+    à la concaténation des shards de generate_dataset_parallel.
+    """
+    item_time_factor, shard_seeds = _spawn_seeds(random_state, n_shards)
+
+    n_written = 0
+    start = time.perf_counter()
+    with ChunkWriter(output_path) as writer:
+        for n_shard, shard_seed in zip(_shard_sizes(n_samples, n_shards), shard_seeds):
+            for chunk in _iter_shard_chunks(n_shard, shard_seed, item_time_factor, chunk_size):
+                writer.write(chunk)
+                n_written += len(chunk)
+                if verbose:
+                    elapsed = time.perf_counter() - start
+                    print(f"  {n_written} lignes écrites ({n_written / elapsed:,.0f} lignes/s)")
+    return n_written
+
+
+def generate_dataset_parallel(
+    output_dir, n_samples, n_shards, workers=None, chunk_size=1_000_000, random_state=42
+):
+    """
+    Génère `n_shards` shards en parallèle (un processus par shard à la fois),
+    chacun avec son propre flux aléatoire, dans `output_dir/part-XXXXX.parquet`.
+    Le résultat est identique bit à bit pour une graine et un nombre de shards
+    donnés, quels que soient le nombre de processus et `chunk_size`.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    item_time_factor, shard_seeds = _spawn_seeds(random_state, n_shards)
+    sizes = _shard_sizes(n_samples, n_shards)
+    paths = [os.path.join(output_dir, f"part-{i:05d}.parquet") for i in range(n_shards)]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(_write_shard, path, n, seed, item_time_factor, chunk_size)
+            for path, n, seed in zip(paths, sizes, shard_seeds)
+        ]
+        n_written = sum(f.result() for f in futures)
+    return n_written, paths
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Génération du dataset synthétique.")
+    parser.add_argument("--n-samples", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--output",
+        default=None,
+        help="Fichier de sortie .csv ou .parquet (défaut : data/shopping_data.csv), "
+        "ou dossier avec --shards (défaut : data/shopping_data_shards)",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=None,
+        help="Génère et écrit par blocs de cette taille (mémoire bornée)",
+    )
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=None,
+        help="Nombre de shards générés en parallèle (--output est alors un dossier)",
+    )
+    parser.add_argument("--workers", type=int, default=None, help="Processus pour --shards")
+    args = parser.parse_args()
+    if args.output is None:
+        args.output = os.path.join("data", "shopping_data_shards" if args.shards else "shopping_data.csv")
+    if args.shards and os.path.isfile(args.output):
+        parser.error(f"--shards écrit un dossier, mais {args.output} est un fichier")
+
     print("Génération du dataset de temps de shopping...")
-    df = generate_shopping_dataset(n_samples=5000, random_state=42)
 
-    os.makedirs("data", exist_ok=True)
-    output_path = os.path.join("data", "shopping_data.csv")
-    df.to_csv(output_path, index=False, encoding="utf-8")
+    if args.shards:
+        start = time.perf_counter()
+        n_written, paths = generate_dataset_parallel(
+            args.output,
+            args.n_samples,
+            n_shards=args.shards,
+            workers=args.workers,
+            chunk_size=args.chunk_size or 1_000_000,
+            random_state=args.seed,
+        )
+        elapsed = time.perf_counter() - start
+        print(f"{n_written} lignes en {len(paths)} shards dans : {args.output}")
+        print(f"Temps : {elapsed:.1f} s ({n_written / elapsed:,.0f} lignes/s)")
+        return
+
+    output_dir = os.path.dirname(args.output)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    if args.chunk_size:
+        generate_dataset_to_file(
+            args.output, args.n_samples, chunk_size=args.chunk_size, random_state=args.seed
+        )
+        print(f"Dataset généré : {args.output}")
+        return
+
+    df = generate_shopping_dataset(n_samples=args.n_samples, random_state=args.seed)
+    if args.output.endswith(".parquet"):
+        df.to_parquet(args.output, index=False)
+    else:
+        df.to_csv(args.output, index=False, encoding="utf-8")
 
-    print(f"Dataset généré : {output_path}")
+    print(f"Dataset généré : {args.output}")
     print(df.head())
 
 
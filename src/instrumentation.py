@@ -0,0 +1,194 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# Désactivé par défaut : SHOPPING_METRICS=1 (ou enable()) pour mesurer.
+# SHOPPING_METRICS_FILE=chemin.prom|chemin.jsonl pour exporter en fin de script.
+_enabled = os.environ.get("SHOPPING_METRICS", "").lower() in ("1", "true", "yes")
+
+RESERVOIR_SIZE = 2048
+QUANTILES = (0.5, 0.9, 0.99)
+
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+
+
+def enable(flag=True):
+    global _enabled
+    _enabled = flag
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+# ==========================
+# Compteurs et durées
+# ==========================
+class _Histogram:
+    """Nombre, somme et derniers échantillons (réservoir borné pour p50/p99)."""
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+        self.samples = deque(maxlen=RESERVOIR_SIZE)
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        self.samples.append(value)
+
+    def quantiles(self):
+        if not self.samples:
+            return {q: 0.0 for q in QUANTILES}
+        import numpy as np
+
+        values = np.quantile(np.fromiter(self.samples, dtype=float), QUANTILES)
+        return dict(zip(QUANTILES, values.tolist()))
+
+
+def increment(name, value=1, **labels):
+    if not _enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name, value, **labels):
+    if not _enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = _Histogram()
+        histogram.observe(value)
+
+
+class _Timer:
+    __slots__ = ("name", "labels", "start")
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.start, **self.labels)
+
+
+class _NoopTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return None
+
+
+_NOOP_TIMER = _NoopTimer()
+
+
+def timer(name, **labels):
+    """
+    Chronomètre un bloc `with` et enregistre sa durée (secondes) dans
+    l'histogramme `name`. Quand l'instrumentation est désactivée, renvoie un
+    objet vide partagé : le coût se limite à un appel de fonction.
+    """
+    if not _enabled:
+        return _NOOP_TIMER
+    return _Timer(name, labels)
+
+
+# ==========================
+# Export
+# ==========================
+def snapshot():
+    """Copie des métriques : liste de dicts (un par série)."""
+    with _lock:
+        counters = list(_counters.items())
+        histograms = [(key, h.count, h.sum, h.quantiles()) for key, h in _histograms.items()]
+
+    now = time.time()
+    metrics = []
+    for (name, labels), value in counters:
+        metrics.append(
+            {"timestamp": now, "type": "counter", "name": name, "labels": dict(labels), "value": value}
+        )
+    for (name, labels), count, total, quantiles in histograms:
+        metrics.append(
+            {
+                "timestamp": now,
+                "type": "summary",
+                "name": name,
+                "labels": dict(labels),
+                "count": count,
+                "sum": total,
+                "quantiles": {str(q): v for q, v in quantiles.items()},
+            }
+        )
+    return metrics
+
+
+def _format_labels(labels, extra=None):
+    items = list(labels.items()) + list((extra or {}).items())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+def export_prometheus():
+    """Format texte Prometheus (counters et summaries avec quantiles)."""
+    lines = []
+    declared = set()
+    for metric in snapshot():
+        name, labels = metric["name"], metric["labels"]
+        if name not in declared:
+            lines.append(f"# TYPE {name} {metric['type']}")
+            declared.add(name)
+        if metric["type"] == "counter":
+            lines.append(f"{name}{_format_labels(labels)} {metric['value']}")
+        else:
+            for q, value in metric["quantiles"].items():
+                lines.append(f"{name}{_format_labels(labels, {'quantile': q})} {value:.9f}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {metric['sum']:.9f}")
+            lines.append(f"{name}_count{_format_labels(labels)} {metric['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def export_json_lines():
+    return "".join(json.dumps(metric) + "\n" for metric in snapshot())
+
+
+def write_snapshot(path):
+    """Écrit les métriques : .prom -> Prometheus, sinon JSON lines (ajout)."""
+    if path.endswith(".prom"):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(export_prometheus())
+    else:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(export_json_lines())
+
+
+def dump_if_configured():
+    path = os.environ.get("SHOPPING_METRICS_FILE")
+    if _enabled and path:
+        write_snapshot(path)
@@ -0,0 +1,188 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+
+REGISTRY_DIR = os.path.join("models", "registry")
+
+
+def _write_atomic(path, text):
+    # Fichier temporaire dans le même dossier puis renommage : un lecteur voit
+    # l'ancien contenu ou le nouveau, jamais un fichier à moitié écrit
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def data_sha256(path, block_size=1 << 20):
+    """Hash du dataset d'entraînement (fichier, ou dossier de shards trié)."""
+    h = hashlib.sha256()
+    paths = [path]
+    if os.path.isdir(path):
+        paths = sorted(os.path.join(path, name) for name in os.listdir(path))
+    for file_path in paths:
+        h.update(os.path.basename(file_path).encode("utf-8"))
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(block_size), b""):
+                h.update(block)
+    return h.hexdigest()
+
+
+# ==========================
+# Registre local des modèles
+# ==========================
+class ModelRegistry:
+    """
+    Registre adressé par contenu :
+
+    - `objects/<sha256>.joblib` : artefact, jamais modifié une fois écrit
+      (même contenu = même fichier) ;
+    - `objects/<sha256>.json` : métadonnées (hash des données, métriques,
+      temps d'entraînement...) ;
+    - `CURRENT` : id du modèle servi, remplacé atomiquement par `promote`.
+
+    Les processus de prédiction relisent `CURRENT` (ModelHolder) et chargent
+    le nouvel artefact à côté de l'ancien : les requêtes en cours finissent
+    avec l'ancien modèle, aucun fichier ouvert n'est réécrit.
+    """
+
+    def __init__(self, root=REGISTRY_DIR):
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        self.current_file = os.path.join(root, "CURRENT")
+
+    def object_path(self, model_id):
+        return os.path.join(self.objects_dir, f"{model_id}.joblib")
+
+    def _metadata_path(self, model_id):
+        return os.path.join(self.objects_dir, f"{model_id}.json")
+
+    # --------------------------
+    # Écriture
+    # --------------------------
+    def register(self, pipeline, metadata=None):
+        """Sérialise le pipeline, le range sous son hash et retourne son id."""
+        import joblib
+
+        os.makedirs(self.objects_dir, exist_ok=True)
+        tmp_path = os.path.join(self.objects_dir, f"incoming.{os.getpid()}.tmp")
+        joblib.dump(pipeline, tmp_path)
+
+        h = hashlib.sha256()
+        with open(tmp_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        model_id = h.hexdigest()
+
+        path = self.object_path(model_id)
+        if os.path.exists(path):
+            os.remove(tmp_path)  # déjà enregistré
+        else:
+            os.replace(tmp_path, path)
+
+        info = {
+            "model_id": model_id,
+            "registered_at": time.time(),
+            "size_bytes": os.path.getsize(path),
+            **(metadata or {}),
+        }
+        _write_atomic(self._metadata_path(model_id), json.dumps(info, indent=2))
+        return model_id
+
+    def promote(self, model_id):
+        """Fait pointer `CURRENT` sur `model_id` (préfixe accepté)."""
+        model_id = self.resolve(model_id)
+        _write_atomic(self.current_file, model_id + "\n")
+        return model_id
+
+    def export(self, model_id, path):
+        """
+        Expose l'artefact à un chemin classique, remplacé atomiquement. Copie
+        et non lien physique : un `joblib.dump` sur ce chemin ne doit pas
+        pouvoir réécrire l'objet immuable du registre.
+        """
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        shutil.copyfile(self.object_path(model_id), tmp_path)
+        os.replace(tmp_path, path)
+        return path
+
+    # --------------------------
+    # Lecture
+    # --------------------------
+    def current_id(self):
+        """Id du modèle courant, ou None si le registre est vide."""
+        try:
+            with open(self.current_file, encoding="utf-8") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def current_path(self):
+        model_id = self.current_id()
+        return self.object_path(model_id) if model_id else None
+
+    def resolve(self, prefix):
+        """Id complet à partir d'un préfixe non ambigu."""
+        matches = [model_id for model_id in self.ids() if model_id.startswith(prefix)]
+        if len(matches) != 1:
+            raise KeyError(f"Modèle {prefix!r} : {len(matches)} correspondance(s) dans {self.root}")
+        return matches[0]
+
+    def ids(self):
+        if not os.path.isdir(self.objects_dir):
+            return []
+        return [name[: -len(".joblib")] for name in os.listdir(self.objects_dir) if name.endswith(".joblib")]
+
+    def metadata(self, model_id):
+        try:
+            with open(self._metadata_path(model_id), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"model_id": model_id}
+
+    def list(self):
+        """Métadonnées de tous les modèles, du plus ancien au plus récent."""
+        return sorted((self.metadata(model_id) for model_id in self.ids()), key=lambda m: m.get("registered_at", 0))
+
+
+def registry_for(model_path):
+    """Registre associé à un chemin de modèle : `registry/` dans le même dossier."""
+    return ModelRegistry(os.path.join(os.path.dirname(model_path), "registry"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Registre local des modèles.")
+    parser.add_argument("--root", default=REGISTRY_DIR)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("list", help="Modèles enregistrés")
+    promote = subparsers.add_parser("promote", help="Change le modèle servi (déploiement ou retour arrière)")
+    promote.add_argument("model_id", help="Id ou préfixe d'id")
+    promote.add_argument(
+        "--export",
+        default=os.path.join("models", "shopping_time_model.joblib"),
+        help="Fichier classique remplacé par le modèle promu (vide : aucun)",
+    )
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.root)
+    if args.command == "promote":
+        model_id = registry.promote(args.model_id)
+        if args.export:
+            registry.export(model_id, args.export)
+        print(f"Modèle courant : {model_id[:12]}")
+        return
+
+    current = registry.current_id()
+    for info in registry.list():
+        scores = info.get("metrics", {})
+        marker = "*" if info["model_id"] == current else " "
+        registered = time.strftime("%Y-%m-%d %H:%M", time.localtime(info.get("registered_at", 0)))
+        rmse = f"RMSE {scores['rmse']:.2f}" if "rmse" in scores else ""
+        print(f"{marker} {info['model_id'][:12]}  {registered}  {info.get('source', '')}  {rmse}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+
+import instrumentation as metrics
+from model_registry import ModelRegistry, registry_for
+
+MODEL_PATH = os.path.join("models", "shopping_time_model.joblib")
+
+logger = logging.getLogger(__name__)
+
+
+# ==========================
+# Détenteur du modèle (partagé par tout le processus)
+# ==========================
+class ModelHolder:
+    """
+    Garde le pipeline chargé en mémoire entre les appels.
+
+    - joblib.load(..., mmap_mode="r") ne memory-mappe que les tableaux NumPy
+      gardés tels quels : sklearn recopie les nœuds de chaque arbre en mémoire
+      (Tree.__setstate__), la forêt est donc chargée en entier. Pour des
+      arbres réellement lus à la demande, voir le format compact
+      (compact_model.py) ;
+    - si un registre (`registry/` à côté de `path`) a un modèle courant, c'est
+      lui qui est servi : le pointeur `CURRENT` est relu au plus toutes les
+      `check_interval` secondes et un nouveau modèle est chargé à côté de
+      l'ancien (les appels en cours gardent leur référence). `path` n'est
+      alors qu'une copie exportée : l'écrire directement ne change pas le
+      modèle servi, on journalise seulement un avertissement si son contenu
+      diffère du modèle courant (il faut passer par `model_registry.py
+      promote`) ;
+    - sinon, la signature du fichier (mtime + taille) est vérifiée au même
+      rythme ; si elle change, on calcule le hash du fichier et on recharge
+      seulement si le contenu est différent ;
+    - si le rechargement échoue (fichier supprimé, artefact illisible), le
+      modèle déjà chargé reste servi et l'erreur est journalisée ; elle n'est
+      levée que s'il n'y a encore aucun modèle ;
+    - le chargement est protégé par un verrou (thread-safe).
+    """
+
+    def __init__(self, path=MODEL_PATH, mmap_mode="r", check_interval=1.0, registry_dir=None):
+        self.path = path
+        self.mmap_mode = mmap_mode
+        self.check_interval = check_interval
+        self.registry = registry_for(path) if registry_dir is None else ModelRegistry(registry_dir)
+
+        self._lock = threading.Lock()
+        self._model = None
+        self._current = None  # (modèle, version), remplacé d'un bloc
+        self._signature = None
+        self._loaded_path = None
+        self._version = None
+        self._load_time = None
+        self._loaded_at = None
+        self._n_loads = 0
+        self._last_check = 0.0
+        self._legacy_stat = None
+
+    def _stat_signature(self):
+        model_id = self.registry.current_id()
+        if model_id is not None:
+            self._check_legacy_copy(model_id)
+            return ("registry", model_id)
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(
+                f"Modèle introuvable : {self.path}. "
+                "Lance d'abord : python src/train_model.py"
+            )
+        st = os.stat(self.path)
+        return (st.st_mtime_ns, st.st_size)
+
+    def _check_legacy_copy(self, model_id):
+        # Le fichier n'est hashé que si sa signature (mtime + taille) change
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        stat = (st.st_mtime_ns, st.st_size, model_id)
+        if stat == self._legacy_stat:
+            return
+        self._legacy_stat = stat
+        if file_sha256(self.path) != model_id:
+            logger.warning(
+                "%s diffère du modèle courant du registre (%s) et est ignoré : "
+                "enregistrer et promouvoir le modèle avec model_registry.py",
+                self.path,
+                model_id[:12],
+            )
+
+    def _load(self, signature):
+        if signature[0] == "registry":
+            # Artefact adressé par contenu : l'id est déjà le hash du fichier
+            path = self.registry.object_path(signature[1])
+            version = signature[1][:12]
+        else:
+            path = self.path
+            version = file_sha256(path)[:12]
+        if self._model is not None and version == self._version:
+            # Fichier touché mais contenu identique : pas de rechargement
+            self._signature = signature
+            return
+
+        import joblib  # chargé au premier modèle, pas à l'import du module
+
+        start = time.perf_counter()
+        model = joblib.load(path, mmap_mode=self.mmap_mode)
+        load_time = time.perf_counter() - start
+        metrics.observe("shopping_predict_stage_seconds", load_time, stage="model_load")
+        metrics.increment("shopping_model_loads_total")
+
+        self._model = model
+        self._current = (model, version)
+        self._signature = signature
+        self._loaded_path = path
+        self._version = version
+        self._load_time = load_time
+        self._loaded_at = time.time()
+        self._n_loads += 1
+
+    def get(self):
+        """Retourne le modèle actif, en le (re)chargeant si nécessaire."""
+        return self.get_versioned()[0]
+
+    def get_versioned(self):
+        """
+        Retourne le couple (modèle, version) actif. Les deux viennent du même
+        chargement, même si un rechargement a lieu entre-temps : à utiliser
+        dès que la version sert de clé (cache, table précalculée).
+        """
+        current = self._current
+        if current is not None and time.monotonic() - self._last_check < self.check_interval:
+            return current
+
+        with self._lock:
+            try:
+                signature = self._stat_signature()
+                if self._model is None or signature != self._signature:
+                    self._load(signature)
+            except Exception:
+                if self._model is None:
+                    raise
+                logger.exception(
+                    "Rechargement du modèle impossible (%s), le modèle %s reste servi",
+                    self.path,
+                    self._version,
+                )
+                metrics.increment("shopping_model_load_errors_total")
+            self._last_check = time.monotonic()
+            return self._current
+
+    @property
+    def version(self):
+        return self._version
+
+    def info(self):
+        """Informations sur le modèle actif (version, temps de chargement...)."""
+        return {
+            "path": self._loaded_path or self.path,
+            "version": self._version,
+            "load_time_s": self._load_time,
+            "loaded_at": self._loaded_at,
+            "n_loads": self._n_loads,
+        }
+
+
+def file_sha256(path, block_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+_holders = {}
+_holders_lock = threading.Lock()
+
+
+def get_model_holder(path=MODEL_PATH):
+    """Retourne le ModelHolder unique du processus pour ce chemin."""
+    key = os.path.abspath(path)
+    holder = _holders.get(key)
+    if holder is None:
+        with _holders_lock:
+            holder = _holders.get(key)
+            if holder is None:
+                holder = ModelHolder(path)
+                _holders[key] = holder
+    return holder
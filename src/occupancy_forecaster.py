@@ -0,0 +1,236 @@
+import argparse
+import heapq
+import time
+
+import numpy as np
+import pandas as pd
+
+import instrumentation as metrics
+from dataset_format import CATEGORIES
+from feature_encoder import predict_frame
+from features import FEATURES, RAW_VISIT_COLUMNS, add_derived_features
+from model_store import MODEL_PATH, get_model_holder
+
+DATA_PATH = "data/shopping_data.csv"
+
+TIMESTAMP_COL = "timestamp"  # secondes depuis le lundi 00:00 de référence
+STORE_COL = "store_id"
+
+
+# ==========================
+# Occupation en ligne
+# ==========================
+class OccupancyForecaster:
+    """
+    Consomme un flux d'arrivées horodatées et tient à jour le nombre de
+    clients présents par magasin, maintenant et à chaque horizon (en minutes).
+
+    Les arrivées sont bufferisées en colonnes puis prédites par lots (un seul
+    predict pour `batch_size` arrivées, ou dès que la plus ancienne attend
+    depuis `max_delay` secondes). Pour chaque horizon h, un tas des
+    départs prévus et un compteur par magasin : un client compte tant que son
+    départ est après `maintenant + h`. Ajout et retrait en O(log n),
+    `occupancy()` en O(1). Les requêtes reflètent les arrivées déjà prédites.
+    """
+
+    def __init__(self, model, horizons=(0, 30), batch_size=8192, max_delay=1.0):
+        self.model = model
+        self.horizons = list(horizons)
+        self._horizon_index = {h: i for i, h in enumerate(self.horizons)}
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+
+        self.now = float("-inf")
+        self._offsets = [60.0 * h for h in self.horizons]
+        self._heaps = [[] for _ in self.horizons]
+        self._counts = [[] for _ in self.horizons]
+        self._store_index = {}
+        self._stores = []
+
+        self._pending_stores = []
+        self._pending_times = []
+        self._pending_since = None
+        self._pending = {col: [] for col in RAW_VISIT_COLUMNS}
+        self.n_arrivals = 0
+
+    def _index(self, store):
+        index = self._store_index.get(store)
+        if index is None:
+            index = len(self._stores)
+            self._store_index[store] = index
+            self._stores.append(store)
+            for counts in self._counts:
+                counts.append(0)
+        return index
+
+    # --------------------------
+    # Flux d'arrivées
+    # --------------------------
+    def submit(self, event):
+        """Ajoute une arrivée : dict avec `timestamp`, `store_id` et les colonnes brutes."""
+        if not self._pending_times:
+            self._pending_since = time.monotonic()
+        self._pending_times.append(float(event[TIMESTAMP_COL]))
+        self._pending_stores.append(self._index(event[STORE_COL]))
+        for col, values in self._pending.items():
+            values.append(event[col])
+
+        if len(self._pending_times) >= self.batch_size or time.monotonic() - self._pending_since >= self.max_delay:
+            self.flush()
+
+    def flush(self):
+        """Prédit les arrivées en attente, les ajoute aux tas et avance l'horloge."""
+        if not self._pending_times:
+            return
+        with metrics.timer("shopping_occupancy_flush_seconds"):
+            df = add_derived_features(pd.DataFrame(self._pending))
+            minutes = predict_frame(self.model, df[FEATURES])
+            times = self._pending_times
+            departures = (np.asarray(times) + 60.0 * np.maximum(minutes, 0.0)).tolist()
+            stores = self._pending_stores
+            self._pending_times, self._pending_stores = [], []
+            self._pending = {col: [] for col in RAW_VISIT_COLUMNS}
+
+            # Les départs déjà passés à l'horizon (arrivée en retard) ne comptent pas
+            now = max(self.now, max(times))
+            for offset, heap, counts in zip(self._offsets, self._heaps, self._counts):
+                limit = now + offset
+                for departure, store in zip(departures, stores):
+                    if departure > limit:
+                        heapq.heappush(heap, (departure, store))
+                        counts[store] += 1
+            self.n_arrivals += len(times)
+            self.advance(now)
+        metrics.increment("shopping_occupancy_arrivals_total", len(times))
+
+    def advance(self, now):
+        """Avance l'horloge du flux : retire les départs passés à chaque horizon."""
+        if now <= self.now:
+            return
+        self.now = now
+        for offset, heap, counts in zip(self._offsets, self._heaps, self._counts):
+            limit = now + offset
+            while heap and heap[0][0] <= limit:
+                _, store = heapq.heappop(heap)
+                counts[store] -= 1
+
+    # --------------------------
+    # Requêtes O(1)
+    # --------------------------
+    def occupancy(self, store, horizon=0):
+        """Clients présents dans `store` à maintenant + `horizon` minutes."""
+        h = self._horizon_index.get(horizon)
+        if h is None:
+            raise ValueError(
+                f"Horizon {horizon!r} non suivi (horizons configurés : {', '.join(map(str, self.horizons))})"
+            )
+        index = self._store_index.get(store)
+        if index is None:
+            return 0
+        return self._counts[h][index]
+
+    def snapshot(self):
+        """{magasin: {horizon: occupation}} pour tous les magasins vus."""
+        return {
+            store: {h: counts[i] for h, counts in zip(self.horizons, self._counts)}
+            for i, store in enumerate(self._stores)
+        }
+
+
+# ==========================
+# Flux simulé et vérification
+# ==========================
+def simulate_arrivals(n_events, n_stores=20, arrivals_per_minute=60.0, data_path=DATA_PATH, seed=0):
+    """
+    Flux d'arrivées trié par temps : visites tirées du dataset, magasins
+    tirés au hasard (type fixe par magasin), jour et heure recalculés depuis
+    l'horodatage.
+    """
+    rng = np.random.default_rng(seed)
+    visits = pd.read_csv(data_path, usecols=RAW_VISIT_COLUMNS)
+    events = visits.sample(n_events, replace=True, random_state=seed).reset_index(drop=True)
+
+    gaps = rng.exponential(60.0 / arrivals_per_minute, n_events)
+    events[TIMESTAMP_COL] = np.cumsum(gaps)
+    store_types = rng.choice(CATEGORIES["store_type"], n_stores)
+    events[STORE_COL] = rng.integers(0, n_stores, n_events)
+    events["store_type"] = store_types[events[STORE_COL]]
+    hours = (events[TIMESTAMP_COL] // 3600).astype(int)
+    events["hour"] = hours % 24
+    events["day_of_week"] = (hours // 24) % 7
+    return events
+
+
+def offline_occupancy(model, events, now, horizons):
+    """Référence hors ligne : tout prédire, puis compter les présents par magasin."""
+    df = add_derived_features(events[RAW_VISIT_COLUMNS].copy())
+    departures = events[TIMESTAMP_COL].to_numpy() + 60.0 * np.maximum(predict_frame(model, df[FEATURES]), 0.0)
+    arrived = events[TIMESTAMP_COL].to_numpy() <= now
+    result = {}
+    for h in horizons:
+        present = arrived & (departures > now + 60.0 * h)
+        result[h] = events.loc[present, STORE_COL].value_counts().to_dict()
+    return result
+
+
+def benchmark(model, events, horizons=(0, 30), batch_size=8192, max_delay=1.0):
+    records = events[[TIMESTAMP_COL, STORE_COL] + RAW_VISIT_COLUMNS].to_dict("records")
+    forecaster = OccupancyForecaster(model, horizons=horizons, batch_size=batch_size, max_delay=max_delay)
+
+    start = time.perf_counter()
+    for record in records:
+        forecaster.submit(record)
+    forecaster.flush()
+    elapsed = time.perf_counter() - start
+
+    stores = list(forecaster.snapshot())
+    n_queries = 100_000
+    start = time.perf_counter()
+    for i in range(n_queries):
+        forecaster.occupancy(stores[i % len(stores)], horizons[-1])
+    query_us = (time.perf_counter() - start) / n_queries * 1e6
+
+    reference = offline_occupancy(model, events, forecaster.now, horizons)
+    mismatches = sum(
+        forecaster.occupancy(store, h) != reference[h].get(store, 0) for store in stores for h in horizons
+    )
+    return {
+        "events": len(records),
+        "events_per_s": len(records) / elapsed,
+        "query_us": query_us,
+        "mismatches": mismatches,
+        "forecaster": forecaster,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Occupation des magasins à partir d'un flux d'arrivées.")
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--stores", type=int, default=20)
+    parser.add_argument("--arrivals-per-minute", type=float, default=60.0)
+    parser.add_argument("--horizons", type=int, nargs="+", default=[0, 30], help="Horizons en minutes")
+    parser.add_argument("--batch-size", type=int, default=8192)
+    parser.add_argument("--max-delay", type=float, default=1.0, help="Attente max d'une arrivée avant prédiction (s)")
+    parser.add_argument(
+        "--n-jobs", type=int, default=1, help="Threads de prédiction de la forêt (-1 : tous les cœurs)"
+    )
+    args = parser.parse_args()
+
+    model = get_model_holder(MODEL_PATH).get()
+    if "n_jobs" in model.named_steps["model"].get_params():
+        # Débit mesuré à nombre de threads connu (le modèle entraîné a n_jobs=-1)
+        model.set_params(model__n_jobs=args.n_jobs)
+    events = simulate_arrivals(args.events, args.stores, args.arrivals_per_minute)
+    result = benchmark(model, events, args.horizons, args.batch_size, args.max_delay)
+
+    print(f"=== Occupation à t = {result['forecaster'].now / 3600:.1f} h de flux ===")
+    for store, by_horizon in sorted(result["forecaster"].snapshot().items()):
+        print(f"magasin {store:>3} : " + "  ".join(f"+{h} min: {n:4d}" for h, n in by_horizon.items()))
+    print(
+        f"\n{result['events']} arrivées à {result['events_per_s']:,.0f} arrivées/s (n_jobs={args.n_jobs}) ; "
+        f"requête : {result['query_us']:.2f} µs ; écarts avec le calcul hors ligne : {result['mismatches']}"
+    )
+
+
+if __name__ == "__main__":
+    main()
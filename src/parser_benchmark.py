@@ -0,0 +1,83 @@
+import argparse
+import random
+import time
+
+from shopping_list_parser import CATEGORIES, build_pattern, parse_shopping_list_text
+
+
+# ==========================
+# Références et données synthétiques
+# ==========================
+def naive_parse(text: str, categories=CATEGORIES):
+    # Ancienne méthode : un test `in` par mot-clé sur tout le texte
+    text = text.lower()
+    counts = {"items_" + cat: 0 for cat in categories}
+    for cat, keywords in categories.items():
+        for kw in keywords:
+            if kw in text:
+                counts["items_" + cat] += 1
+    return counts
+
+
+def make_catalog(n_extra_keywords, seed=0):
+    # Catalogue élargi (mots synthétiques) pour mesurer l'effet du nombre de mots-clés
+    rng = random.Random(seed)
+    categories = {cat: list(keywords) for cat, keywords in CATEGORIES.items()}
+    names = list(categories)
+    for i in range(n_extra_keywords):
+        word = "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(5, 10)))
+        categories[names[i % len(names)]].append(word)
+    return categories
+
+
+def make_long_list(n_lines, keywords):
+    lines = []
+    for i in range(n_lines):
+        kw = keywords[(i * 7) % len(keywords)]
+        lines.append(f"{i % 5 + 1} {kw} - article n°{i} 1.99 eur")
+    return "\n".join(lines)
+
+
+def _keywords(categories):
+    return list(dict.fromkeys(kw for keywords in categories.values() for kw in keywords))
+
+
+def _time(fn, text, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        counts = fn(text)
+    return (time.perf_counter() - start) / repeats, sum(counts.values())
+
+
+# ==========================
+# Benchmark
+# ==========================
+def benchmark(sizes=(10, 1_000, 5_000, 20_000), catalog_sizes=(0, 1_000, 5_000), repeats=5):
+    print("=== Benchmark du parseur de listes (mots-clés actuels) ===")
+    for n_lines in sizes:
+        text = make_long_list(n_lines, _keywords(CATEGORIES))
+        for label, fn in (("naïf", naive_parse), ("regex", parse_shopping_list_text)):
+            elapsed, n_items = _time(fn, text, repeats)
+            print(f"  {n_lines:>6} lignes | {label:5s} : {elapsed * 1000:8.2f} ms ({n_items} articles)")
+
+    print("=== Effet de la taille du catalogue (5 000 lignes) ===")
+    for n_extra in catalog_sizes:
+        categories = make_catalog(n_extra)
+        pattern, keyword_to_category = build_pattern(categories)
+        text = make_long_list(5_000, list(keyword_to_category))
+        regex_parse = lambda t: {"n": len(pattern.findall(t.lower()))}
+        naive = lambda t: naive_parse(t, categories)
+        for label, fn in (("naïf", naive), ("regex", regex_parse)):
+            elapsed, _ = _time(fn, text, repeats)
+            print(f"  {len(keyword_to_category):>6} mots-clés | {label:5s} : {elapsed * 1000:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du parseur de listes de courses.")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    benchmark(repeats=args.repeats)
+
+
+if __name__ == "__main__":
+    main()
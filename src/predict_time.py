@@ -1,20 +1,38 @@
-import os
-import joblib
-import pandas as pd
+import threading
 
-MODEL_PATH = os.path.join("models", "shopping_time_model.joblib")
+# Imports légers uniquement : numpy, pandas, sklearn et le modèle sont
+# chargés à la première prédiction (ou en arrière-plan par warm_up)
+import instrumentation as metrics
+from model_store import MODEL_PATH, get_model_holder
+from shopping_list_parser import parse_shopping_list_text
 
 
 # ==========================
 # Chargement du modèle
 # ==========================
 def load_model():
-    if not os.path.exists(MODEL_PATH):
-        raise FileNotFoundError(
-            f"Modèle introuvable : {MODEL_PATH}. "
-            "Lance d'abord : python src/train_model.py"
-        )
-    return joblib.load(MODEL_PATH)
+    # Le modèle reste en mémoire entre les appels ; un nouveau modèle promu
+    # dans le registre (ou un fichier régénéré) est chargé automatiquement.
+    return get_model_holder(MODEL_PATH).get()
+
+
+def warm_up():
+    """Importe la pile de prédiction et charge le modèle."""
+    try:
+        import prediction_cache  # noqa: F401
+        import prediction_table  # noqa: F401
+
+        load_model()
+    except Exception:
+        # L'erreur (modèle absent...) sera affichée à la prédiction
+        pass
+
+
+def start_warm_up():
+    """Lance warm_up dans un thread pendant que l'utilisateur répond."""
+    thread = threading.Thread(target=warm_up, daemon=True)
+    thread.start()
+    return thread
 
 
 # ==========================
@@ -65,64 +83,6 @@ def ask_yes_no(prompt):
         print("Répondez par 'o' (oui) ou 'n' (non).")
 
 
-def parse_shopping_list_text(text: str):
-    text = text.lower()
-
-    categories = {
-        "alimentaire": [
-            # anciens mots
-            "yaourt", "yaourts", "pomme", "riz", "pates", "pâtes", "lait", "pain", "fromage", "steak",
-            # viandes
-            "boeuf", "bœuf", "poulet", "cuisse", "cuisses", "blanc de poulet", "côte", "cotis",
-            # poissons
-            "poisson", "bar", "tilapia",
-            # féculents / accompagnements
-            "riz", "riz cassé", "macedoine", "macédoine", "mais", "maïs",
-            # légumes / condiments
-            "tomate", "tomates", "poivron", "ail", "sauce",
-            # autres
-            "huile"
-        ],
-        "vetements": ["jean", "jeans", "robe", "tshirt", "t-shirt", "chemise", "pantalon"],
-        "electronique": ["tv", "télé", "tele", "télévision", "telephone", "smartphone", "ordinateur", "laptop", "tablette"],
-        "maison": ["coussin", "assiette", "verre", "rideau", "linge", "poele", "poêle", "casserole"],
-        "beaute": ["shampoing", "shampooing", "gel douche", "parfum", "maquillage", "creme", "crème"],
-        "sport": ["ballon", "chaussures de sport", "dumbbell", "tapis yoga"],
-        "librairie": ["livre", "cahier", "stylo", "agenda"],
-    }
-
-    counts = {
-        "items_alimentaire": 0,
-        "items_vetements": 0,
-        "items_electronique": 0,
-        "items_maison": 0,
-        "items_beaute": 0,
-        "items_sport": 0,
-        "items_librairie": 0,
-    }
-
-    for cat, keywords in categories.items():
-        for kw in keywords:
-            if kw in text:
-                if cat == "alimentaire":
-                    counts["items_alimentaire"] += 1
-                elif cat == "vetements":
-                    counts["items_vetements"] += 1
-                elif cat == "electronique":
-                    counts["items_electronique"] += 1
-                elif cat == "maison":
-                    counts["items_maison"] += 1
-                elif cat == "beaute":
-                    counts["items_beaute"] += 1
-                elif cat == "sport":
-                    counts["items_sport"] += 1
-                elif cat == "librairie":
-                    counts["items_librairie"] += 1
-
-    return counts
-
-
-
 # ==========================
 # Construction de l'input utilisateur
 # ==========================
@@ -261,25 +221,46 @@ def build_input_from_user():
 # Prédiction
 # ==========================
 def predict_shopping_time(input_dict):
-    model = load_model()
-    X = pd.DataFrame(input_dict)
-    y_pred = model.predict(X)
+    from prediction_cache import get_prediction_cache
+    from prediction_table import get_prediction_table
+
+    with metrics.timer("shopping_predict_seconds"):
+        # Modèle et version du même chargement : le cache et la table ne
+        # peuvent pas associer une prédiction à la version d'un autre modèle
+        model, version = get_model_holder(MODEL_PATH).get_versioned()
+
+        # Configuration de la grille précalculée : lecture directe en O(1)
+        table = get_prediction_table()
+        if table is not None and table.version == version:
+            value = table.lookup(input_dict)
+            if value is not None:
+                return value
+
+        # Encodage direct du dict, sans DataFrame ni ColumnTransformer ;
+        # les configurations déjà vues sont servies par le cache
+        y_pred = get_prediction_cache().predict_records(model, [input_dict], version=version)
     return float(y_pred[0])
 
 
 def main():
     print("=== Prédiction du temps de shopping ===\n")
+    start_warm_up()
     try:
         input_data = build_input_from_user()
         predicted_time = predict_shopping_time(input_data)
         print("\n=== Résultat ===")
         print(f"Temps estimé pour ce profil et cette liste : {predicted_time:.1f} minutes")
 
+        info = get_model_holder(MODEL_PATH).info()
+        print(f"(modèle {info['version']}, chargé en {info['load_time_s']:.2f} s)")
+
     except FileNotFoundError as e:
         print(e)
     except Exception as e:
         print("Erreur lors de la prédiction :", e)
 
+    metrics.dump_if_configured()
+
 
 if __name__ == "__main__":
     main()
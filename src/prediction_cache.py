@@ -0,0 +1,187 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+import instrumentation as metrics
+from feature_encoder import complete_record, predict_records
+from features import CATEGORICAL_FEATURES, FEATURES
+
+DEFAULT_MAX_SIZE = 100_000
+
+_CATEGORICAL = set(CATEGORICAL_FEATURES)
+
+
+# ==========================
+# Clé canonique
+# ==========================
+def canonical_key(record):
+    """
+    Tuple des 21 features dans l'ordre de FEATURES : valeur exacte (float)
+    pour les numériques/binaires, chaînes pour les catégories. Les variables
+    dérivées absentes sont recalculées, deux dicts équivalents ont donc la
+    même clé (21 et 21.0 aussi, pas 21 et 21.4). None si une valeur
+    numérique est NaN ou non numérique : la visite n'est pas mise en cache.
+    """
+    try:
+        values = complete_record(record)
+        key = tuple(str(values[f]) if f in _CATEGORICAL else float(values[f]) for f in FEATURES)
+    except (TypeError, ValueError):
+        # Quantité NaN ou non numérique : le modèle tranchera
+        return None
+    if any(value != value for value in key):
+        return None
+    return key
+
+
+def frame_keys(X):
+    """Clés canoniques des lignes d'un DataFrame de features (None si NaN)."""
+    numeric_features = [f for f in FEATURES if f not in _CATEGORICAL]
+    numeric = X[numeric_features].to_numpy(dtype=np.float64)
+    columns = {f: X[f].astype(str).tolist() for f in FEATURES if f in _CATEGORICAL}
+    columns.update(zip(numeric_features, numeric.T.tolist()))
+    cacheable = ~np.isnan(numeric).any(axis=1)
+    keys = zip(*(columns[f] for f in FEATURES))
+    return [key if ok else None for key, ok in zip(keys, cacheable.tolist())]
+
+
+# ==========================
+# Cache LRU (+ TTL optionnel)
+# ==========================
+class _Uncacheable:
+    """Tient la place d'une clé None parmi les manquantes : jamais mémorisée."""
+
+
+class PredictionCache:
+    """
+    Mémorise les prédictions par clé canonique. Taille bornée (`max_size`
+    entrées, ~0,5 Ko chacune) avec éviction LRU, expiration optionnelle
+    (`ttl` secondes). Le cache est lié à une version du modèle : si la
+    version change (rechargement), il est vidé.
+    """
+
+    def __init__(self, max_size=DEFAULT_MAX_SIZE, ttl=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _sync_version(self, version):
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+
+    def _lookup(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and now >= expires_at:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _store(self, key, value, now):
+        expires_at = now + self.ttl if self.ttl is not None else None
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+            metrics.increment("shopping_cache_evictions_total")
+
+    def predict_keys(self, keys, predict_missing, version=None):
+        """
+        Renvoie un tableau de prédictions pour `keys`. Les clés absentes
+        (dédoublonnées) et les clés None (non cachables) sont prédites en un
+        seul appel à `predict_missing(indices)`, où `indices` donne la première
+        position de chaque clé manquante dans `keys`.
+        """
+        y = np.empty(len(keys), dtype=np.float64)
+        missing = {}
+        now = time.monotonic()
+        with self._lock:
+            self._sync_version(version)
+            for i, key in enumerate(keys):
+                if key is None:
+                    # Visite non cachable : prédite seule, jamais mémorisée
+                    missing[_Uncacheable()] = [i]
+                    continue
+                value = self._lookup(key, now)
+                if value is None:
+                    missing.setdefault(key, []).append(i)
+                else:
+                    y[i] = value
+        n_hits = len(keys) - sum(len(positions) for positions in missing.values())
+
+        if missing:
+            first = [positions[0] for positions in missing.values()]
+            values = np.asarray(predict_missing(first), dtype=np.float64)
+            now = time.monotonic()
+            with self._lock:
+                for (key, positions), value in zip(missing.items(), values):
+                    y[positions] = value
+                    if version == self._version and not isinstance(key, _Uncacheable):
+                        self._store(key, float(value), now)
+
+        n_misses = len(keys) - n_hits
+        with self._lock:
+            self.hits += n_hits
+            self.misses += n_misses
+        metrics.increment("shopping_cache_hits_total", n_hits)
+        metrics.increment("shopping_cache_misses_total", n_misses)
+        return y
+
+    def predict_records(self, model, records, version=None):
+        """Comme feature_encoder.predict_records, avec le cache devant."""
+        keys = [canonical_key(record) for record in records]
+        return self.predict_keys(
+            keys,
+            lambda idx: predict_records(model, [records[i] for i in idx]),
+            version=version,
+        )
+
+    def predict_frame(self, model, X, version=None):
+        """Prédiction d'un DataFrame de features (chemin batch)."""
+        X = X[FEATURES]
+        return self.predict_keys(
+            frame_keys(X),
+            lambda idx: model.predict(X.iloc[idx]),
+            version=version,
+        )
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+            "model_version": self._version,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_prediction_cache(max_size=DEFAULT_MAX_SIZE, ttl=None):
+    """Retourne le cache unique du processus (créé au premier appel)."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = PredictionCache(max_size=max_size, ttl=ttl)
+    return _cache
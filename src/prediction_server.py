@@ -0,0 +1,443 @@
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import instrumentation as metrics
+from dataset_format import CATEGORIES
+from feature_encoder import predict_records
+from features import ITEM_COLUMNS, RAW_VISIT_COLUMNS
+from model_store import MODEL_PATH, get_model_holder
+
+MAX_BODY_BYTES = 1 << 20
+
+# Bornes des champs numériques d'une visite
+NUMERIC_RANGES = {
+    "age": (10, 100),
+    "hour": (0, 23),
+    "day_of_week": (0, 6),
+    "has_shopping_list": (0, 1),
+    **{col: (0, 999) for col in ITEM_COLUMNS},
+}
+
+
+# ==========================
+# Validation
+# ==========================
+class ValidationError(ValueError):
+    pass
+
+
+class RequestError(Exception):
+    """Requête mal formée : réponse d'erreur puis fermeture de la connexion."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def validate_record(record):
+    """
+    Vérifie une visite JSON (colonnes brutes) et renvoie un dict propre.
+    Les variables dérivées (period, is_weekend, total_items...) sont
+    recalculées par l'encodeur.
+    """
+    if not isinstance(record, dict):
+        raise ValidationError("chaque visite doit être un objet JSON")
+    missing = [c for c in RAW_VISIT_COLUMNS if c not in record]
+    if missing:
+        raise ValidationError(f"champs manquants : {', '.join(missing)}")
+
+    clean = {}
+    for name, (low, high) in NUMERIC_RANGES.items():
+        value = record[name]
+        if isinstance(value, bool) or not isinstance(value, int):
+            raise ValidationError(f"{name} doit être un entier")
+        if not low <= value <= high:
+            raise ValidationError(f"{name} doit être entre {low} et {high}")
+        clean[name] = value
+    for name in ("gender", "profile", "store_type", "special_event"):
+        value = record[name]
+        if value not in CATEGORIES[name]:
+            raise ValidationError(f"{name} invalide : {value!r} (choix : {', '.join(CATEGORIES[name])})")
+        clean[name] = value
+    return clean
+
+
+# ==========================
+# Micro-batching
+# ==========================
+class MicroBatcher:
+    """
+    Regroupe les requêtes concurrentes : la première visite en attente ouvre
+    un lot, qui part dès qu'il contient `max_batch_size` visites ou que
+    `max_wait` secondes se sont écoulées. Un seul predict vectorisé par lot,
+    exécuté dans un thread pour ne pas bloquer la boucle asyncio ; chaque
+    appelant récupère sa propre prédiction via un Future.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=64, max_wait=0.005):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue = asyncio.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._task = None
+        self.n_batches = 0
+        self.n_records = 0
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._executor.shutdown(wait=True)
+
+    async def predict(self, record):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((record, future))
+        return await future
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            # D'abord ce qui est déjà en file, sans attendre
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            records = [record for record, _ in batch]
+            try:
+                with metrics.timer("shopping_server_batch_seconds"):
+                    y_pred = await loop.run_in_executor(self._executor, self.predict_fn, records)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.n_batches += 1
+            self.n_records += len(batch)
+            metrics.observe("shopping_server_batch_size", len(batch))
+            for (_, future), value in zip(batch, y_pred):
+                if not future.done():  # client parti entre-temps
+                    future.set_result(float(value))
+
+
+def predict_with_holder(records):
+    model = get_model_holder(MODEL_PATH).get()
+    return predict_records(model, records)
+
+
+# ==========================
+# Serveur HTTP (asyncio, sans dépendance)
+# ==========================
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class PredictionServer:
+    """
+    Routes :
+      POST /predict  une visite (objet) -> {"predicted_time_min": ...}
+                     ou une liste de visites -> {"predicted_time_min": [...]}
+      GET  /health   version du modèle et statistiques de batching
+      GET  /metrics  métriques au format Prometheus (si activées)
+    """
+
+    def __init__(self, batcher):
+        self.batcher = batcher
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                    if request is None:
+                        break
+                    method, path, headers, body = request
+                    status, payload, content_type = await self._dispatch(method, path, body)
+                    keep_alive = headers.get("connection", "").lower() != "close"
+                except RequestError as e:
+                    # Corps non lu ou illisible : on ne peut pas enchaîner une
+                    # autre requête sur cette connexion
+                    status, payload, content_type = e.status, {"error": str(e)}, "application/json"
+                    keep_alive = False
+                self._write_response(writer, status, payload, content_type, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, path, _ = line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            return None
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            key, _, value = line.decode("latin-1").partition(":")
+            headers[key.strip().lower()] = value.strip()
+
+        length = headers.get("content-length", "0")
+        if not (length.isascii() and length.isdigit()):
+            raise RequestError(400, "Content-Length invalide")
+        length = int(length)
+        if length > MAX_BODY_BYTES:
+            raise RequestError(413, "requête trop volumineuse")
+        body = await reader.readexactly(length) if length else b""
+        return method, path, headers, body
+
+    async def _dispatch(self, method, path, body):
+        if path == "/health" and method == "GET":
+            holder = get_model_holder(MODEL_PATH)
+            return 200, {
+                "status": "ok",
+                "model_version": holder.version,
+                "batches": self.batcher.n_batches,
+                "records": self.batcher.n_records,
+            }, "application/json"
+        if path == "/metrics" and method == "GET":
+            return 200, metrics.export_prometheus(), "text/plain; version=0.0.4"
+        if path != "/predict":
+            return 404, {"error": "route inconnue"}, "application/json"
+        if method != "POST":
+            return 405, {"error": "utiliser POST"}, "application/json"
+
+        try:
+            data = json.loads(body)
+            records = data if isinstance(data, list) else [data]
+            if not records:
+                raise ValidationError("liste de visites vide")
+            clean = [validate_record(record) for record in records]
+        except ValidationError as e:
+            return 400, {"error": str(e)}, "application/json"
+        except ValueError:
+            # JSONDecodeError, ou UnicodeDecodeError si le corps n'est pas de l'UTF-8
+            raise RequestError(400, "JSON invalide")
+
+        try:
+            y_pred = await asyncio.gather(*(self.batcher.predict(record) for record in clean))
+        except Exception as e:
+            return 500, {"error": f"erreur de prédiction : {e}"}, "application/json"
+
+        metrics.increment("shopping_server_requests_total")
+        result = y_pred if isinstance(data, list) else y_pred[0]
+        return 200, {"predicted_time_min": result}, "application/json"
+
+    @staticmethod
+    def _write_response(writer, status, payload, content_type, keep_alive):
+        body = payload if isinstance(payload, str) else json.dumps(payload)
+        body = body.encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+
+
+async def serve(host="127.0.0.1", port=8000, max_batch_size=64, max_wait_ms=5.0):
+    # Chargement avant la première requête
+    get_model_holder(MODEL_PATH).get()
+
+    batcher = MicroBatcher(predict_with_holder, max_batch_size=max_batch_size, max_wait=max_wait_ms / 1000)
+    batcher.start()
+    server = await asyncio.start_server(PredictionServer(batcher).handle_connection, host, port)
+    print(f"Serveur de prédiction sur http://{host}:{port} (lots de {max_batch_size} max, attente {max_wait_ms} ms max)", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await batcher.stop()
+
+
+# ==========================
+# Test de charge
+# ==========================
+SAMPLE_VISIT = {
+    "age": 35,
+    "gender": "femme",
+    "profile": "normal",
+    "store_type": "supermarche",
+    "day_of_week": 5,
+    "hour": 15,
+    "special_event": "aucun",
+    "has_shopping_list": 1,
+    "items_alimentaire": 12,
+    "items_vetements": 1,
+    "items_electronique": 0,
+    "items_maison": 2,
+    "items_beaute": 1,
+    "items_sport": 0,
+    "items_librairie": 0,
+}
+
+
+async def _client(host, port, n_requests, latencies):
+    reader, writer = await asyncio.open_connection(host, port)
+    body = json.dumps(SAMPLE_VISIT).encode("utf-8")
+    request = (
+        f"POST /predict HTTP/1.1\r\nHost: {host}\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+    ).encode("latin-1") + body
+    try:
+        for _ in range(n_requests):
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            length = 0
+            status = await reader.readline()
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":")[1])
+            await reader.readexactly(length)
+            if b" 200 " not in status:
+                raise RuntimeError(f"Réponse inattendue : {status!r}")
+            latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, concurrency, n_requests):
+    """`concurrency` clients keep-alive envoient chacun `n_requests` requêtes."""
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(_client(host, port, n_requests, latencies) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    lat_ms = np.asarray(latencies) * 1000
+    return {
+        "requests": len(latencies),
+        "throughput_rps": len(latencies) / elapsed,
+        "p50_ms": float(np.percentile(lat_ms, 50)),
+        "p99_ms": float(np.percentile(lat_ms, 99)),
+    }
+
+
+def _wait_until_ready(host, port, process, timeout=120.0):
+    async def probe():
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write(b"GET /health HTTP/1.1\r\nConnection: close\r\n\r\n")
+        await writer.drain()
+        await reader.read()
+        writer.close()
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("Le serveur s'est arrêté au démarrage.")
+        try:
+            asyncio.run(probe())
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise TimeoutError("Le serveur n'a pas démarré à temps.")
+
+
+def load_test(concurrency=32, n_requests=50, max_batch_size=64, max_wait_ms=5.0, port=8765):
+    """
+    Lance le serveur dans un sous-processus, une fois sans batching (un
+    predict par requête) puis avec micro-batching, et mesure débit et
+    latences p50/p99 côté client.
+    """
+    host = "127.0.0.1"
+    script = os.path.abspath(__file__)
+    report = {}
+    for label, batch_size in (("1 predict/requête", 1), ("micro-batching", max_batch_size)):
+        cmd = [
+            sys.executable, script, "serve",
+            "--host", host, "--port", str(port),
+            "--max-batch-size", str(batch_size),
+            "--max-wait-ms", str(max_wait_ms if batch_size > 1 else 0),
+        ]
+        process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL)
+        try:
+            _wait_until_ready(host, port, process)
+            asyncio.run(run_load(host, port, concurrency, 2))  # préchauffage
+            report[label] = asyncio.run(run_load(host, port, concurrency, n_requests))
+        finally:
+            process.terminate()
+            process.wait()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur HTTP de prédiction avec micro-batching.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_serve = sub.add_parser("serve", help="Lance le serveur")
+    p_serve.add_argument("--host", default="127.0.0.1")
+    p_serve.add_argument("--port", type=int, default=8000)
+    p_serve.add_argument("--max-batch-size", type=int, default=64)
+    p_serve.add_argument("--max-wait-ms", type=float, default=5.0)
+
+    p_load = sub.add_parser("loadtest", help="Compare 1 predict/requête et micro-batching")
+    p_load.add_argument("--concurrency", type=int, default=32)
+    p_load.add_argument("--requests", type=int, default=50, help="Requêtes par client")
+    p_load.add_argument("--max-batch-size", type=int, default=64)
+    p_load.add_argument("--max-wait-ms", type=float, default=5.0)
+    p_load.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        try:
+            asyncio.run(serve(args.host, args.port, args.max_batch_size, args.max_wait_ms))
+        except KeyboardInterrupt:
+            pass
+        return
+
+    print(f"=== Test de charge ({args.concurrency} clients x {args.requests} requêtes) ===")
+    report = load_test(args.concurrency, args.requests, args.max_batch_size, args.max_wait_ms, args.port)
+    for label, r in report.items():
+        print(
+            f"  {label:20s} : {r['throughput_rps']:8.0f} req/s | "
+            f"p50 {r['p50_ms']:8.1f} ms | p99 {r['p99_ms']:8.1f} ms"
+        )
+    base, batched = report.values()
+    print(
+        f"Gain : débit x{batched['throughput_rps'] / base['throughput_rps']:.1f}, "
+        f"p99 x{base['p99_ms'] / batched['p99_ms']:.1f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
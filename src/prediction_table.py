@@ -0,0 +1,357 @@
+import argparse
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from dataset_format import CATEGORIES, read_dataset
+from feature_encoder import complete_record, predict_records
+from features import FEATURES, RAW_VISIT_COLUMNS, add_derived_features
+from model_store import MODEL_PATH, get_model_holder
+
+TABLE_PATH = os.path.join("models", "prediction_table.npy")
+
+# Grille "borne" par défaut (~4,1 M cases, 16 Mo en float32). Une case n'est
+# servie que si chaque valeur de la visite est exactement un point de la
+# grille : la table rend la prédiction du modèle pour ce point, jamais une
+# approximation. Jour et heure d'ouverture sont des axes complets ; les
+# quantités sont celles proposées par la borne. L'âge, que la borne ne
+# demande pas, n'est pas un axe : la table est construite à un âge fixe ; une
+# visite qui l'omet prend cette valeur, un autre âge passe par le modèle.
+DEFAULT_GRID = {
+    "store_type": CATEGORIES["store_type"],
+    "profile": CATEGORIES["profile"],
+    "day_of_week": list(range(7)),
+    "hour": list(range(9, 21)),
+    "special_event": CATEGORIES["special_event"],
+    "has_shopping_list": [0, 1],
+    "gender": CATEGORIES["gender"],
+    "items_alimentaire": [5, 10, 15, 20],
+    "items_vetements": [0, 1, 2],
+    "items_electronique": [0, 1],
+    "items_maison": [0, 2],
+    "items_beaute": [0, 2],
+    "items_sport": [0],
+    "items_librairie": [0],
+}
+DEFAULT_FIXED = {"age": 40}
+
+
+def _meta_path(path):
+    return os.path.splitext(path)[0] + ".json"
+
+
+# ==========================
+# Construction
+# ==========================
+def _grid_frame(grid, start, stop):
+    """Visites brutes des cases [start, stop) (ordre C sur les dimensions)."""
+    names = list(grid)
+    shape = tuple(len(grid[name]) for name in names)
+    positions = np.unravel_index(np.arange(start, stop), shape)
+    return pd.DataFrame(
+        {name: np.asarray(grid[name])[pos] for name, pos in zip(names, positions)}
+    )
+
+
+def build_table(
+    pipeline,
+    grid=DEFAULT_GRID,
+    fixed=DEFAULT_FIXED,
+    path=TABLE_PATH,
+    batch_size=200_000,
+    version=None,
+    verbose=True,
+):
+    """
+    Évalue le pipeline sur toutes les cases de la grille par gros lots et
+    écrit les prédictions (float32) dans un .npy memory-mappable. Les
+    métadonnées (dimensions, valeurs, colonnes fixes, version du modèle,
+    fichier de données) vont dans le .json de `path`. Chaque colonne de
+    `fixed` est une dimension à une seule valeur.
+
+    Publication atomique : les données sont écrites dans un fichier au nom
+    unique, puis le .json qui le désigne est remplacé par `os.replace`. Un
+    lecteur voit l'ancienne table complète ou la nouvelle, jamais un mélange.
+    Retourne le nombre de cases.
+    """
+    grid = {**grid, **{name: [value] for name, value in fixed.items()}}
+    missing = [c for c in RAW_VISIT_COLUMNS if c not in grid]
+    if missing:
+        raise ValueError(f"Colonnes absentes de la grille : {missing}")
+    grid = {name: list(grid[name]) for name in RAW_VISIT_COLUMNS}
+    n_cells = int(np.prod([len(values) for values in grid.values()]))
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    base = os.path.splitext(path)[0]
+    data_path = f"{base}.{version or 'sans-version'}.{time.time_ns()}.npy"
+    table = np.lib.format.open_memmap(data_path, mode="w+", dtype=np.float32, shape=(n_cells,))
+    start_time = time.perf_counter()
+    for start in range(0, n_cells, batch_size):
+        stop = min(start + batch_size, n_cells)
+        X = add_derived_features(_grid_frame(grid, start, stop))[FEATURES]
+        table[start:stop] = pipeline.predict(X)
+        if verbose:
+            rate = stop / (time.perf_counter() - start_time)
+            print(f"  {stop}/{n_cells} cases ({rate:,.0f} cases/s)")
+    table.flush()
+    del table
+
+    previous = _read_meta(path)
+    meta = {
+        "version": version,
+        "data_file": os.path.basename(data_path),
+        "dimensions": list(grid),
+        "values": grid,
+        "fixed": dict(fixed),
+        "n_cells": n_cells,
+    }
+    meta_path = _meta_path(path)
+    tmp_path = f"{meta_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_path, meta_path)
+
+    # Ancienne table : les processus qui l'ont ouverte en mmap la gardent lisible
+    if previous and previous.get("data_file") not in (None, meta["data_file"]):
+        try:
+            os.remove(os.path.join(os.path.dirname(path), previous["data_file"]))
+        except OSError:
+            pass
+    return n_cells
+
+
+def _read_meta(path):
+    try:
+        with open(_meta_path(path), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+# ==========================
+# Lecture
+# ==========================
+class PredictionTable:
+    """
+    Table précalculée, memory-mappée. Index d'une visite : somme des
+    positions de ses valeurs dans chaque dimension multipliées par les pas
+    (ordre C), position par dict valeur -> position. Lookup en O(nombre de
+    dimensions) ; seule une visite égale à un point de la grille est servie.
+    """
+
+    def __init__(self, path=TABLE_PATH):
+        meta = _read_meta(path)
+        if meta is None:
+            raise FileNotFoundError(f"Table introuvable : {_meta_path(path)}")
+        if meta.get("edges"):
+            # Ancien format à intervalles : approximatif, à reconstruire
+            raise ValueError(f"Table à intervalles non supportée : {_meta_path(path)}, relancer build")
+        self.path = path
+        self.data_path = os.path.join(os.path.dirname(path), meta["data_file"])
+        self.version = meta["version"]
+        self.dimensions = meta["dimensions"]
+        self.values = meta["values"]
+        self.table = np.load(self.data_path, mmap_mode="r")
+        if len(self.table) != meta["n_cells"]:
+            raise ValueError(f"Table incohérente : {len(self.table)} cases, {meta['n_cells']} attendues")
+
+        shape = [len(self.values[name]) for name in self.dimensions]
+        self.strides = [int(np.prod(shape[i + 1:])) for i in range(len(shape))]
+        self._positions = [{value: i for i, value in enumerate(self.values[name])} for name in self.dimensions]
+        # Colonnes fixes (hors axes) : facultatives dans une requête
+        self.fixed = meta.get("fixed", {})
+
+    @property
+    def n_cells(self):
+        return len(self.table)
+
+    @property
+    def size_mb(self):
+        return os.path.getsize(self.data_path) / 2**20
+
+    def index(self, record):
+        """Index de la case d'une visite, ou None si elle est hors grille."""
+        values = complete_record({**self.fixed, **record})
+        idx = 0
+        for name, positions, stride in zip(self.dimensions, self._positions, self.strides):
+            try:
+                pos = positions.get(values[name])
+            except TypeError:  # valeur non hashable
+                pos = None
+            if pos is None:
+                return None
+            idx += pos * stride
+        return idx
+
+    def lookup(self, record):
+        idx = self.index(record)
+        return None if idx is None else float(self.table[idx])
+
+    def frame_codes(self, df):
+        """Position de chaque ligne dans chaque dimension (-1 hors grille)."""
+        codes = {}
+        for name in self.dimensions:
+            if name not in df.columns:
+                codes[name] = np.zeros(len(df), dtype=np.int64)  # colonne fixe omise
+            else:
+                codes[name] = pd.Index(self.values[name]).get_indexer(df[name].astype(object))
+        return codes
+
+    def frame_index(self, df):
+        """Index de chaque ligne d'un DataFrame de visites (-1 hors grille)."""
+        idx = np.zeros(len(df), dtype=np.int64)
+        hit = np.ones(len(df), dtype=bool)
+        for (name, codes), stride in zip(self.frame_codes(df).items(), self.strides):
+            hit &= codes >= 0
+            idx += codes.astype(np.int64) * stride
+        return np.where(hit, idx, -1)
+
+    def predict_records(self, model, records, version=None):
+        """
+        Hits servis par la table, le reste prédit par le modèle en un appel.
+        Si `version` diffère de celle de la table, tout passe par le modèle.
+        """
+        y = np.empty(len(records), dtype=np.float64)
+        misses = []
+        for i, record in enumerate(records):
+            idx = self.index(record) if version is None or version == self.version else None
+            if idx is None:
+                misses.append(i)
+            else:
+                y[i] = self.table[idx]
+        if misses:
+            y[misses] = predict_records(model, [records[i] for i in misses])
+        return y
+
+
+_tables = {}
+_tables_lock = threading.Lock()
+
+
+def _meta_signature(path):
+    try:
+        st = os.stat(_meta_path(path))
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def get_prediction_table(path=TABLE_PATH, check_interval=1.0):
+    """
+    Table du processus pour ce chemin, ou None si elle n'a pas (encore) été
+    construite. Comme pour ModelHolder, le .json est re-vérifié au plus toutes
+    les `check_interval` secondes : une table construite ou reconstruite
+    après le démarrage est prise en compte sans redémarrage.
+    """
+    key = os.path.abspath(path)
+    entry = _tables.get(key)
+    now = time.monotonic()
+    if entry is not None and now - entry["checked_at"] < check_interval:
+        return entry["table"]
+
+    with _tables_lock:
+        signature = _meta_signature(path)
+        table = entry["table"] if entry is not None and entry["signature"] == signature else None
+        if signature is not None and table is None:
+            try:
+                table = PredictionTable(path)
+            except (OSError, ValueError, KeyError):
+                table = None
+        # Échec de chargement : signature oubliée pour réessayer au prochain contrôle
+        _tables[key] = {"table": table, "signature": signature if table is not None else None, "checked_at": now}
+    return table
+
+
+# ==========================
+# Rapport
+# ==========================
+def coverage_report(table, traffic, model=None):
+    """
+    Part du trafic réel servie par la table : visites complètes, et requêtes
+    de borne (colonnes fixes omises, donc prises à la valeur de la table).
+    Part couverte dimension par dimension, pour voir quelle liste de valeurs
+    élargir. Si `model` est fourni, écart table/modèle sur les hits (arrondi
+    float32 seulement : une case est la prédiction exacte de son point).
+    """
+    idx = table.frame_index(traffic)
+    kiosk = traffic.drop(columns=[c for c in table.fixed if c in traffic.columns])
+    kiosk_idx = table.frame_index(kiosk)
+    kiosk_hit = kiosk_idx >= 0
+    report = {
+        "n_cells": table.n_cells,
+        "size_mb": table.size_mb,
+        "traffic_rows": len(traffic),
+        "coverage": float((idx >= 0).mean()) if len(traffic) else 0.0,
+        "kiosk_coverage": float(kiosk_hit.mean()) if len(traffic) else 0.0,
+        "by_dimension": {
+            name: float((codes >= 0).mean()) if len(traffic) else 0.0
+            for name, codes in table.frame_codes(traffic).items()
+        },
+    }
+    if model is not None and kiosk_hit.any():
+        sample = kiosk[kiosk_hit].head(10_000).assign(**table.fixed)
+        X = add_derived_features(sample[RAW_VISIT_COLUMNS])[FEATURES]
+        diff = np.abs(table.table[kiosk_idx[kiosk_hit][: len(sample)]] - model.predict(X))
+        report["max_abs_diff"] = float(diff.max())
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Table de prédictions précalculée.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_build = sub.add_parser("build", help="Évalue le modèle sur la grille")
+    p_build.add_argument(
+        "--grid",
+        default=None,
+        help="JSON {colonne: [valeurs]} (remplace les dimensions données)",
+    )
+    p_build.add_argument("--output", default=TABLE_PATH)
+    p_build.add_argument("--batch-size", type=int, default=200_000)
+
+    p_report = sub.add_parser("report", help="Taille de la table et couverture du trafic")
+    p_report.add_argument("--table", default=TABLE_PATH)
+    p_report.add_argument("--traffic", default="data/shopping_data.csv", help="Visites réelles (.csv/.parquet/.arrow)")
+    args = parser.parse_args()
+
+    model, version = get_model_holder(MODEL_PATH).get_versioned()
+
+    if args.command == "build":
+        grid, fixed = dict(DEFAULT_GRID), dict(DEFAULT_FIXED)
+        if args.grid:
+            with open(args.grid, encoding="utf-8") as f:
+                for name, values in json.load(f).items():
+                    fixed.pop(name, None)
+                    grid[name] = values
+        print("=== Construction de la table de prédictions ===")
+        start = time.perf_counter()
+        n_cells = build_table(
+            model, grid, fixed, args.output, batch_size=args.batch_size, version=version
+        )
+        print(f"{n_cells} cases écrites dans {args.output} en {time.perf_counter() - start:.1f} s")
+        return
+
+    table = PredictionTable(args.table)
+    if table.version != version:
+        print(f"Attention : table construite avec le modèle {table.version}, modèle actif {version}.")
+    traffic = read_dataset(args.traffic, columns=RAW_VISIT_COLUMNS)
+    report = coverage_report(table, traffic, model)
+    print("=== Table de prédictions ===")
+    print(f"Cases          : {report['n_cells']:,}")
+    print(f"Taille         : {report['size_mb']:.1f} Mo")
+    print(f"Trafic couvert : {report['coverage']:.2%} de {report['traffic_rows']:,} visites")
+    fixed = ", ".join(f"{name}={value}" for name, value in table.fixed.items()) or "aucune"
+    print(f"Requêtes borne : {report['kiosk_coverage']:.2%} (colonnes fixes omises : {fixed})")
+    print("Couverture par dimension :")
+    for name, share in report["by_dimension"].items():
+        print(f"  {name:20s} : {share:7.2%} ({len(table.values[name])} valeurs)")
+    if "max_abs_diff" in report:
+        print(f"Écart table/modèle sur les hits : {report['max_abs_diff']:.2e} min au max")
+
+
+if __name__ == "__main__":
+    main()
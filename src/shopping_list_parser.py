@@ -0,0 +1,108 @@
+import re
+
+# ==========================
+# Mots-clés par catégorie
+# ==========================
+CATEGORIES = {
+    "alimentaire": [
+        # anciens mots
+        "yaourt", "yaourts", "pomme", "riz", "pates", "pâtes", "lait", "pain", "fromage", "steak",
+        # viandes
+        "boeuf", "bœuf", "poulet", "cuisse", "cuisses", "blanc de poulet", "côte", "cotis",
+        # poissons
+        "poisson", "bar", "tilapia",
+        # féculents / accompagnements
+        "riz", "riz cassé", "macedoine", "macédoine", "mais", "maïs",
+        # légumes / condiments
+        "tomate", "tomates", "poivron", "ail", "sauce",
+        # autres
+        "huile"
+    ],
+    "vetements": ["jean", "jeans", "robe", "tshirt", "t-shirt", "chemise", "pantalon"],
+    "electronique": ["tv", "télé", "tele", "télévision", "telephone", "smartphone", "ordinateur", "laptop", "tablette"],
+    "maison": ["coussin", "assiette", "verre", "rideau", "linge", "poele", "poêle", "casserole"],
+    "beaute": ["shampoing", "shampooing", "gel douche", "parfum", "maquillage", "creme", "crème"],
+    "sport": ["ballon", "chaussures de sport", "dumbbell", "tapis yoga"],
+    "librairie": ["livre", "cahier", "stylo", "agenda"],
+}
+
+# Plafond d'une quantité lue ("5000 stylos" compte pour 999) : mêmes bornes
+# que les champs items_* du serveur de prédiction
+MAX_QUANTITY = 999
+
+
+def _trie_regex(words):
+    """
+    Construit une alternative factorisée par préfixes communs
+    ("c(?:ahier|hemise|...)") : le moteur regex suit alors un seul chemin par
+    position au lieu d'essayer chaque mot-clé. Les mots les plus longs passent
+    en premier, donc "riz cassé" l'emporte sur "riz".
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def to_regex(node):
+        branches = [
+            re.escape(char) + to_regex(child)
+            for char, child in sorted(node.items())
+            if char
+        ]
+        if not branches:
+            return ""
+        alternation = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            # Fin de mot possible ici : le mot plus long reste prioritaire
+            return "(?:" + alternation + ")?"
+        return alternation
+
+    return to_regex(trie)
+
+
+def build_pattern(categories):
+    keyword_to_category = {}
+    for cat, keywords in categories.items():
+        for kw in keywords:
+            keyword_to_category.setdefault(kw, cat)
+
+    # Le \b en tête fait échouer immédiatement les positions en milieu de mot
+    pattern = re.compile(
+        r"\b(?:(?<![.,])(?P<qty>\d+(?:[.,]\d+)?)\s*(?:x\s*)?)?"
+        r"(?P<kw>" + _trie_regex(keyword_to_category) + r")(?:s|x)?\b"
+    )
+    return pattern, keyword_to_category
+
+
+_PATTERN, _KEYWORD_TO_CATEGORY = build_pattern(CATEGORIES)
+
+
+# ==========================
+# Analyse d'une liste de courses
+# ==========================
+def _quantity(qty):
+    # Décimale ("10.5", "1,5") : partie entière, au moins 1 ; plafonnée
+    if not qty:
+        return 1
+    return min(max(int(float(qty.replace(",", "."))), 1), MAX_QUANTITY)
+
+
+def iter_items(text: str):
+    """
+    Parcourt le texte une seule fois et renvoie (mot-clé, catégorie, quantité)
+    pour chaque article trouvé. La quantité est le nombre qui précède le mot
+    ("10 yaourts", "2x jean"), 1 par défaut, plafonnée à MAX_QUANTITY.
+    """
+    # findall renvoie directement les tuples (quantité, mot-clé) : pas d'objet
+    # Match par article, c'est la partie la plus coûteuse sur les longues listes
+    for qty, kw in _PATTERN.findall(text.lower()):
+        yield kw, _KEYWORD_TO_CATEGORY[kw], _quantity(qty)
+
+
+def parse_shopping_list_text(text: str):
+    counts = {"items_" + cat: 0 for cat in CATEGORIES}
+    for _, cat, qty in iter_items(text):
+        counts["items_" + cat] += qty
+    return counts
@@ -0,0 +1,142 @@
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Réponses au questionnaire de predict_time.py, dans l'ordre des questions
+CLI_ANSWERS = "\n".join(
+    [
+        "35",  # âge
+        "1",  # femme
+        "2",  # normal
+        "1",  # supermarche
+        "6",  # samedi
+        "1",  # aucun événement
+        "15",  # heure
+        "o",  # liste de courses
+        "o",  # liste texte
+        "10 yaourts, 2 jeans, 1 TV, 3 shampoings",
+    ]
+) + "\n"
+
+FIRST_PROMPT = "Âge du client".encode("utf-8")
+FIRST_PREDICTION = "Temps estimé".encode("utf-8")
+
+
+# ==========================
+# Profil d'import (-X importtime)
+# ==========================
+def import_profile(module):
+    """
+    Importe `module` dans un interpréteur neuf avec `-X importtime` et
+    renvoie (temps cumulé du module en s, liste des (module, temps propre en s)
+    triée du plus coûteux au moins coûteux).
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SRC_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    total = 0.0
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append((name.strip(), int(self_us) / 1e6))
+        if name.strip() == module:
+            total = int(cumulative_us) / 1e6
+    modules.sort(key=lambda item: item[1], reverse=True)
+    return total, modules
+
+
+# ==========================
+# Démarrage du CLI
+# ==========================
+def _time_until(marker, stdin_text, think_time=0.0, timeout=300):
+    """
+    Lance predict_time.py et mesure le temps jusqu'à `marker` sur stdout.
+    Avec `think_time`, les réponses sont envoyées après ce délai (utilisateur
+    qui réfléchit) et le chrono part à l'envoi.
+    """
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-u", os.path.join(SRC_DIR, "predict_time.py")],
+        cwd=os.path.dirname(SRC_DIR),
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        if think_time:
+            time.sleep(think_time)
+            start = time.perf_counter()
+        if stdin_text:
+            process.stdin.write(stdin_text.encode("utf-8"))
+            process.stdin.flush()
+        output = b""
+        while marker not in output:
+            chunk = process.stdout.read1(4096)
+            if not chunk:
+                raise RuntimeError(f"{marker.decode()!r} jamais affiché : {output[-300:]!r}")
+            output += chunk
+            if time.perf_counter() - start > timeout:
+                raise TimeoutError(marker.decode())
+        return time.perf_counter() - start
+    finally:
+        process.kill()
+        process.wait()
+
+
+def time_to_first_prompt(repeats=5):
+    return float(np.median([_time_until(FIRST_PROMPT, "") for _ in range(repeats)]))
+
+
+def time_to_first_prediction(repeats=5, think_time=0.0):
+    return float(
+        np.median(
+            [_time_until(FIRST_PREDICTION, CLI_ANSWERS, think_time=think_time) for _ in range(repeats)]
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Temps de démarrage du CLI et de l'app Streamlit.")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="Modules les plus coûteux affichés")
+    parser.add_argument(
+        "--think-time",
+        type=float,
+        default=3.0,
+        help="Délai avant les réponses pour la mesure 'après saisie' (s)",
+    )
+    args = parser.parse_args()
+
+    print("=== Démarrage ===")
+    for module in ("predict_time", "app_streamlit"):
+        try:
+            total, modules = import_profile(module)
+        except RuntimeError as e:
+            print(f"\nimport {module} : impossible ({e})")
+            continue
+        print(f"\nimport {module} : {total * 1000:.0f} ms")
+        for name, seconds in modules[: args.top]:
+            print(f"  {seconds * 1000:8.1f} ms  {name}")
+
+    print(f"\nPremière question du CLI : {time_to_first_prompt(args.repeats) * 1000:.0f} ms")
+    print(f"Première prédiction du CLI : {time_to_first_prediction(args.repeats) * 1000:.0f} ms (réponses immédiates)")
+    after_input = time_to_first_prediction(args.repeats, think_time=args.think_time)
+    print(f"Prédiction après saisie    : {after_input * 1000:.0f} ms (réponses après {args.think_time:.0f} s)")
+
+
+if __name__ == "__main__":
+    main()
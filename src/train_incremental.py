@@ -0,0 +1,152 @@
+import argparse
+import copy
+import time
+
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.model_selection import train_test_split
+
+from features import FEATURES, TARGET_COL
+from model_registry import data_sha256, registry_for
+from train_model import MODEL_PATH, create_pipeline, evaluate, load_data, save_model
+
+
+# ==========================
+# Ajout d'arbres sur les nouvelles visites
+# ==========================
+def grow_forest(pipeline, X_new, y_new, n_trees=20, max_trees=None):
+    """
+    Ajoute `n_trees` arbres entraînés sur les seules nouvelles visites
+    (`warm_start`), avec le préprocesseur du pipeline gelé (mêmes moyennes,
+    mêmes catégories). Au-delà de `max_trees`, les arbres les plus anciens
+    sont retirés : avec `max_trees` = taille actuelle, les nouveaux arbres
+    remplacent les plus vieux. Modifie le pipeline en place.
+    """
+    forest = pipeline.named_steps["model"]
+    if not isinstance(forest, RandomForestRegressor):
+        raise ValueError("L'entraînement incrémental ne gère que le backend forest.")
+
+    Xt = pipeline.named_steps["preprocessor"].transform(X_new)
+    # Les arbres sont ajoutés à la fin de estimators_ : l'ordre est celui de l'âge
+    forest.set_params(warm_start=True, n_estimators=len(forest.estimators_) + n_trees)
+    forest.fit(Xt, np.asarray(y_new, dtype=np.float64))
+    forest.set_params(warm_start=False)
+
+    n_retired = 0
+    if max_trees is not None and len(forest.estimators_) > max_trees:
+        n_retired = len(forest.estimators_) - max_trees
+        forest.estimators_ = forest.estimators_[n_retired:]
+        forest.n_estimators = len(forest.estimators_)
+    return n_retired
+
+
+def load_pipeline(path=MODEL_PATH):
+    # Modèle courant du registre s'il existe, chargé en entier (sans mmap) :
+    # le pipeline va être modifié puis réécrit
+    return joblib.load(registry_for(path).current_path() or path)
+
+
+# ==========================
+# Comparaison avec une reconstruction complète
+# ==========================
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def build_report(df, new_fraction=0.1, n_trees=20, random_state=42):
+    """
+    Simule l'arrivée de nouvelles visites : le jeu d'entraînement est coupé
+    en « historique » et « nouveau » (`new_fraction`). On compare, sur le même
+    jeu de test, le modèle historique, l'ajout d'arbres (sans et avec retrait
+    des plus anciens) et la reconstruction complète sur historique + nouveau.
+    """
+    X, y = df[FEATURES], df[TARGET_COL]
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=random_state)
+    X_old, X_new, y_old, y_new = train_test_split(
+        X_train, y_train, test_size=new_fraction, random_state=random_state
+    )
+
+    base, base_s = _timed(lambda: create_pipeline("forest").fit(X_old, y_old))
+    n_base = len(base.named_steps["model"].estimators_)
+    rows = [("historique seul", base_s, n_base, evaluate(base, X_test, y_test))]
+
+    for label, max_trees in (
+        (f"+{n_trees} arbres", None),
+        (f"{n_trees} arbres remplacés", n_base),
+    ):
+        pipeline = copy.deepcopy(base)
+        _, seconds = _timed(lambda: grow_forest(pipeline, X_new, y_new, n_trees, max_trees))
+        n = len(pipeline.named_steps["model"].estimators_)
+        rows.append((label, seconds, n, evaluate(pipeline, X_test, y_test)))
+
+    full, full_s = _timed(lambda: create_pipeline("forest").fit(X_train, y_train))
+    rows.append(("reconstruction complète", full_s, n_base, evaluate(full, X_test, y_test)))
+    return {"n_old": len(X_old), "n_new": len(X_new), "n_test": len(X_test), "rows": rows}
+
+
+def print_report(report):
+    print(
+        f"Historique : {report['n_old']} visites, nouvelles : {report['n_new']}, "
+        f"test : {report['n_test']}"
+    )
+    print(f"{'modèle':<26}{'temps':>10}{'arbres':>8}{'RMSE':>8}{'MAE':>8}")
+    for label, seconds, n_trees, scores in report["rows"]:
+        print(f"{label:<26}{seconds:>9.2f}s{n_trees:>8}{scores['rmse']:>8.2f}{scores['mae']:>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Entraînement incrémental de la forêt (warm_start).")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    update = subparsers.add_parser("update", help="Ajoute des arbres entraînés sur de nouvelles visites")
+    update.add_argument("data", help="Nouvelles visites (.csv, .parquet ou .arrow/.feather)")
+    update.add_argument("--n-trees", type=int, default=20, help="Arbres ajoutés")
+    update.add_argument("--max-trees", type=int, default=None, help="Taille max : les plus anciens sont retirés")
+    update.add_argument("--model", default=MODEL_PATH)
+    update.add_argument("--output", default=None, help="Par défaut, remplace --model")
+    update.add_argument("--test-size", type=float, default=0.2, help="Part des nouvelles visites gardée pour l'évaluation")
+
+    report = subparsers.add_parser("report", help="Compare ajout d'arbres et reconstruction complète")
+    report.add_argument("--data", default="data/shopping_data.csv")
+    report.add_argument("--new-fraction", type=float, default=0.1, help="Part de l'entraînement jouant les nouvelles visites")
+    report.add_argument("--n-trees", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.command == "report":
+        df = load_data(args.data, columns=FEATURES + [TARGET_COL])
+        print_report(build_report(df, new_fraction=args.new_fraction, n_trees=args.n_trees))
+        return
+
+    pipeline = load_pipeline(args.model)
+    df = load_data(args.data, columns=FEATURES + [TARGET_COL])
+    X_new, X_test, y_new, y_test = train_test_split(
+        df[FEATURES], df[TARGET_COL], test_size=args.test_size, random_state=42
+    )
+
+    before = evaluate(pipeline, X_test, y_test)
+    n_retired, seconds = _timed(lambda: grow_forest(pipeline, X_new, y_new, args.n_trees, args.max_trees))
+    after = evaluate(pipeline, X_test, y_test)
+
+    n_trees = len(pipeline.named_steps["model"].estimators_)
+    print(f"{args.n_trees} arbres ajoutés sur {len(X_new)} visites en {seconds:.2f} s ({n_retired} retirés, {n_trees} au total)")
+    print(f"RMSE sur {len(X_test)} nouvelles visites : {before['rmse']:.2f} -> {after['rmse']:.2f} minutes")
+
+    metadata = {
+        "source": "train_incremental",
+        "base_model": args.model,
+        "data_path": args.data,
+        "data_sha256": data_sha256(args.data),
+        "n_rows": len(df),
+        "metrics": after,
+        "fit_time_s": seconds,
+        "n_trees": n_trees,
+    }
+    model_path = save_model(pipeline, args.output or args.model, metadata=metadata)
+    print(f"Modèle sauvegardé dans : {model_path}")
+
+
+if __name__ == "__main__":
+    main()
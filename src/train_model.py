@@ -1,58 +1,38 @@
+import argparse
 import os
+import time
 import joblib
 import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.compose import ColumnTransformer
-from sklearn.preprocessing import OneHotEncoder, StandardScaler
-from sklearn.ensemble import RandomForestRegressor
+from sklearn.preprocessing import OneHotEncoder, OrdinalEncoder, StandardScaler
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
 from sklearn.pipeline import Pipeline
 from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
 import numpy as np
 
-def load_data(path="data/shopping_data.csv"):
-    df = pd.read_csv(path)
+import instrumentation as metrics
+from dataset_format import read_dataset
+from model_registry import data_sha256, registry_for
+from model_store import MODEL_PATH
+from features import (
+    TARGET_COL,
+    NUMERIC_FEATURES,
+    BINARY_FEATURES,
+    CATEGORICAL_FEATURES,
+    FEATURES,
+)
+
+BACKENDS = ("forest", "hgb")
+
+def load_data(path="data/shopping_data.csv", columns=None):
+    # CSV, Parquet (fichier ou dossier de shards) ou Arrow/Feather
+    # (memory-mappé), typés avec le schéma
+    with metrics.timer("shopping_train_stage_seconds", stage="load_data"):
+        df = read_dataset(path, columns=columns)
     return df
 
-def build_pipeline(df: pd.DataFrame) -> Pipeline:
-    target_col = "shopping_time_min"
-
-    numeric_features = [
-        "age",
-        "hour",
-        "day_of_week",
-        "total_items",
-        "nb_categories",
-        "items_alimentaire",
-        "items_vetements",
-        "items_electronique",
-        "items_maison",
-        "items_beaute",
-        "items_sport",
-        "items_librairie",
-    ]
-
-    binary_features = [
-        "is_weekend",
-        "is_sales",
-        "is_holiday",
-        "has_shopping_list",
-    ]
-
-    categorical_features = [
-        "gender",
-        "profile",
-        "store_type",
-        "period",
-        "special_event",
-    ]
-
-    X = df[numeric_features + binary_features + categorical_features]
-    y = df[target_col]
-
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42
-    )
-
+def build_preprocessor(categories="auto") -> ColumnTransformer:
     numeric_transformer = Pipeline(
         steps=[
             ("scaler", StandardScaler()),
@@ -60,22 +40,58 @@ def build_pipeline(df: pd.DataFrame) -> Pipeline:
     )
 
     binary_transformer = "passthrough"
-    categorical_transformer = OneHotEncoder(handle_unknown="ignore")
+    categorical_transformer = OneHotEncoder(categories=categories, handle_unknown="ignore")
 
     preprocessor = ColumnTransformer(
         transformers=[
-            ("num", numeric_transformer, numeric_features),
-            ("bin", binary_transformer, binary_features),
-            ("cat", categorical_transformer, categorical_features),
+            ("num", numeric_transformer, NUMERIC_FEATURES),
+            ("bin", binary_transformer, BINARY_FEATURES),
+            ("cat", categorical_transformer, CATEGORICAL_FEATURES),
         ]
     )
+    return preprocessor
+
+def build_hgb_preprocessor() -> ColumnTransformer:
+    # Pas de one-hot : les catégories sont codées en entiers et passées telles
+    # quelles au HistGradientBoosting (catégorie inconnue -> valeur manquante)
+    categorical_transformer = OrdinalEncoder(
+        handle_unknown="use_encoded_value",
+        unknown_value=np.nan,
+    )
 
-    model = RandomForestRegressor(
-        n_estimators=200,
-        max_depth=12,
-        random_state=42,
-        n_jobs=-1,
+    preprocessor = ColumnTransformer(
+        transformers=[
+            ("num", "passthrough", NUMERIC_FEATURES),
+            ("bin", "passthrough", BINARY_FEATURES),
+            ("cat", categorical_transformer, CATEGORICAL_FEATURES),
+        ]
     )
+    return preprocessor
+
+def create_pipeline(backend="forest") -> Pipeline:
+    if backend == "forest":
+        preprocessor = build_preprocessor()
+        model = RandomForestRegressor(
+            n_estimators=200,
+            max_depth=12,
+            random_state=42,
+            n_jobs=-1,
+        )
+    elif backend == "hgb":
+        preprocessor = build_hgb_preprocessor()
+        n_other = len(NUMERIC_FEATURES) + len(BINARY_FEATURES)
+        categorical_mask = [False] * n_other + [True] * len(CATEGORICAL_FEATURES)
+        model = HistGradientBoostingRegressor(
+            categorical_features=categorical_mask,
+            max_iter=500,
+            learning_rate=0.1,
+            early_stopping=True,
+            validation_fraction=0.1,
+            n_iter_no_change=20,
+            random_state=42,
+        )
+    else:
+        raise ValueError(f"Backend inconnu : {backend} (choix : {', '.join(BACKENDS)})")
 
     pipeline = Pipeline(
         steps=[
@@ -83,33 +99,112 @@ def build_pipeline(df: pd.DataFrame) -> Pipeline:
             ("model", model),
         ]
     )
+    return pipeline
 
-    pipeline.fit(X_train, y_train)
-
-    y_pred = pipeline.predict(X_test)
-
-    rmse = np.sqrt(mean_squared_error(y_test, y_pred))
-    mae = mean_absolute_error(y_test, y_pred)
-    r2 = r2_score(y_test, y_pred)
+def split_data(df: pd.DataFrame):
+    with metrics.timer("shopping_train_stage_seconds", stage="split"):
+        X = df[FEATURES]
+        y = df[TARGET_COL]
+        return train_test_split(X, y, test_size=0.2, random_state=42)
+
+def evaluate(pipeline, X_test, y_test):
+    with metrics.timer("shopping_train_stage_seconds", stage="evaluate"):
+        y_pred = pipeline.predict(X_test)
+    return {
+        "rmse": float(np.sqrt(mean_squared_error(y_test, y_pred))),
+        "mae": float(mean_absolute_error(y_test, y_pred)),
+        "r2": float(r2_score(y_test, y_pred)),
+    }
+
+def train_and_evaluate(df: pd.DataFrame, backend="forest"):
+    """Entraîne le pipeline et retourne (pipeline, scores sur le jeu de test)."""
+    X_train, X_test, y_train, y_test = split_data(df)
+
+    pipeline = create_pipeline(backend)
+    # Équivalent à pipeline.fit, en deux étapes pour chronométrer séparément
+    # le preprocessing et le modèle
+    with metrics.timer("shopping_train_stage_seconds", stage="preprocess_fit"):
+        X_train_t = pipeline.named_steps["preprocessor"].fit_transform(X_train)
+    with metrics.timer("shopping_train_stage_seconds", stage="model_fit", backend=backend):
+        pipeline.named_steps["model"].fit(X_train_t, y_train)
+
+    scores = evaluate(pipeline, X_test, y_test)
 
     print("Évaluation sur le jeu de test :")
-    print(f"  RMSE : {rmse:.2f} minutes")
-    print(f"  MAE  : {mae:.2f} minutes")
-    print(f"  R²   : {r2:.3f}")
+    print(f"  RMSE : {scores['rmse']:.2f} minutes")
+    print(f"  MAE  : {scores['mae']:.2f} minutes")
+    print(f"  R²   : {scores['r2']:.3f}")
 
+    return pipeline, scores
+
+def build_pipeline(df: pd.DataFrame, backend="forest") -> Pipeline:
+    pipeline, _ = train_and_evaluate(df, backend=backend)
     return pipeline
 
-def main():
-    print("Entraînement du modèle de prédiction du temps de shopping...")
-    df = load_data()
+def save_model(pipeline, model_path=MODEL_PATH, metadata=None):
+    os.makedirs(os.path.dirname(model_path) or ".", exist_ok=True)
+    if os.path.abspath(model_path) == os.path.abspath(MODEL_PATH):
+        # Modèle servi : publié dans le registre (artefact sous son hash puis
+        # bascule atomique de CURRENT), le fichier habituel en est une copie
+        registry = registry_for(model_path)
+        model_id = registry.promote(registry.register(pipeline, metadata))
+        registry.export(model_id, model_path)
+        print(f"Modèle {model_id[:12]} enregistré et promu dans : {registry.root}")
+        return model_path
+    # Écriture dans un fichier temporaire puis renommage atomique : les
+    # processus qui ont le modèle memory-mappé gardent l'ancien fichier intact.
+    tmp_path = model_path + ".tmp"
+    joblib.dump(pipeline, tmp_path)
+    os.replace(tmp_path, model_path)
+    return model_path
 
-    pipeline = build_pipeline(df)
+def main():
+    parser = argparse.ArgumentParser(description="Entraînement du modèle.")
+    parser.add_argument(
+        "--data",
+        default="data/shopping_data.csv",
+        help="Dataset (.csv, .parquet ou .arrow/.feather)",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        default="forest",
+        help="forest : RandomForest + one-hot ; hgb : HistGradientBoosting, catégories natives",
+    )
+    parser.add_argument(
+        "--metrics-out",
+        default=None,
+        help="Active les métriques et les exporte (.prom : Prometheus, sinon JSON lines)",
+    )
+    args = parser.parse_args()
+    if args.metrics_out:
+        metrics.enable()
 
-    os.makedirs("models", exist_ok=True)
-    model_path = os.path.join("models", "shopping_time_model.joblib")
-    joblib.dump(pipeline, model_path)
+    print("Entraînement du modèle de prédiction du temps de shopping...")
+    df = load_data(args.data, columns=FEATURES + [TARGET_COL])
+
+    start = time.perf_counter()
+    pipeline, scores = train_and_evaluate(df, backend=args.backend)
+    fit_time = time.perf_counter() - start
+
+    metadata = {
+        "source": "train_model",
+        "backend": args.backend,
+        "data_path": args.data,
+        "data_sha256": data_sha256(args.data),
+        "n_rows": len(df),
+        "metrics": scores,
+        "fit_time_s": fit_time,
+    }
+    model_path = save_model(pipeline, metadata=metadata)
 
     print(f"Modèle sauvegardé dans : {model_path}")
 
+    if args.metrics_out:
+        metrics.write_snapshot(args.metrics_out)
+        print(f"Métriques exportées dans : {args.metrics_out}")
+    else:
+        metrics.dump_if_configured()
+
 if __name__ == "__main__":
     main()
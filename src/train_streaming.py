@@ -0,0 +1,226 @@
+import argparse
+import os
+import time
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from chunk_io import iter_chunks
+from dataset_format import CATEGORIES, apply_schema
+from features import CATEGORICAL_FEATURES, FEATURES, NUMERIC_FEATURES, TARGET_COL
+from train_model import build_preprocessor, save_model
+
+
+# ==========================
+# Découpage train/test en flux
+# ==========================
+def is_test_row(row_index, test_size=0.2):
+    """
+    Affecte chaque ligne au jeu de test d'après un hash de son numéro :
+    la répartition ne dépend pas de la taille des blocs et ne demande
+    aucun état.
+    """
+    h = (np.asarray(row_index, dtype=np.uint64) * np.uint64(0x9E3779B1)) % np.uint64(1000)
+    return h < int(test_size * 1000)
+
+
+def iter_split_chunks(path, chunk_size, test_size):
+    """Renvoie (X_train, y_train, X_test, y_test) pour chaque bloc du fichier."""
+    row = 0
+    for chunk in iter_chunks(path, chunk_size=chunk_size, columns=FEATURES + [TARGET_COL]):
+        chunk = apply_schema(chunk)
+        test = is_test_row(np.arange(row, row + len(chunk)), test_size)
+        row += len(chunk)
+        X, y = chunk[FEATURES], chunk[TARGET_COL].to_numpy(dtype=np.float64)
+        yield X[~test], y[~test], X[test], y[test]
+
+
+# ==========================
+# Métriques en flux
+# ==========================
+class StreamingMetrics:
+    """RMSE / MAE / R² accumulés bloc par bloc (mémoire constante)."""
+
+    def __init__(self):
+        self.n = 0
+        self.sum_sq_err = 0.0
+        self.sum_abs_err = 0.0
+        self.sum_y = 0.0
+        self.sum_y2 = 0.0
+
+    def update(self, y_true, y_pred):
+        err = y_true - y_pred
+        self.n += len(y_true)
+        self.sum_sq_err += float(np.dot(err, err))
+        self.sum_abs_err += float(np.abs(err).sum())
+        self.sum_y += float(y_true.sum())
+        self.sum_y2 += float(np.dot(y_true, y_true))
+
+    def result(self):
+        ss_tot = self.sum_y2 - self.sum_y ** 2 / self.n
+        return {
+            "rmse": float(np.sqrt(self.sum_sq_err / self.n)),
+            "mae": self.sum_abs_err / self.n,
+            "r2": 1.0 - self.sum_sq_err / ss_tot,
+            "n_test": self.n,
+        }
+
+
+# ==========================
+# Entraînement hors mémoire
+# ==========================
+def fit_preprocessor_streaming(path, chunk_size, test_size):
+    """
+    1er passage : statistiques du StandardScaler par partial_fit, bloc par
+    bloc. Les catégories du one-hot viennent du schéma du dataset.
+    """
+    scaler = StandardScaler()
+    first_chunk = None
+    for X_train, _, _, _ in iter_split_chunks(path, chunk_size, test_size):
+        if len(X_train) == 0:
+            continue
+        scaler.partial_fit(X_train[NUMERIC_FEATURES].to_numpy(dtype=np.float64))
+        if first_chunk is None:
+            first_chunk = X_train.head(1000)
+
+    if first_chunk is None:
+        raise ValueError(f"Aucune ligne d'entraînement dans : {path}")
+
+    categories = [CATEGORIES[name] for name in CATEGORICAL_FEATURES]
+    preprocessor = build_preprocessor(categories=categories)
+    preprocessor.fit(first_chunk)
+
+    # On remplace les statistiques estimées sur le premier bloc par celles
+    # accumulées sur tout le fichier
+    fitted_scaler = preprocessor.named_transformers_["num"].named_steps["scaler"]
+    for attr in ("mean_", "var_", "scale_", "n_samples_seen_"):
+        setattr(fitted_scaler, attr, getattr(scaler, attr))
+    return preprocessor
+
+
+def train_streaming(
+    path,
+    chunk_size=500_000,
+    test_size=0.2,
+    trees_per_chunk=10,
+    max_trees=200,
+    max_depth=12,
+    random_state=42,
+    verbose=True,
+):
+    """
+    Entraîne le pipeline sur un fichier plus grand que la RAM en 3 passages :
+    1. statistiques du préprocesseur ;
+    2. une petite forêt par bloc, dont les arbres rejoignent l'ensemble final
+       (échantillonnage réservoir au-delà de `max_trees` pour borner la taille) ;
+    3. évaluation en flux sur les lignes de test.
+    """
+    rng = np.random.default_rng(random_state)
+    timings = {}
+
+    start = time.perf_counter()
+    preprocessor = fit_preprocessor_streaming(path, chunk_size, test_size)
+    timings["preprocessing_s"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    forest = None
+    trees = []
+    n_seen_trees = 0
+    n_train = 0
+    for i, (X_train, y_train, _, _) in enumerate(iter_split_chunks(path, chunk_size, test_size)):
+        if len(X_train) == 0:
+            continue
+        chunk_forest = RandomForestRegressor(
+            n_estimators=trees_per_chunk,
+            max_depth=max_depth,
+            random_state=int(rng.integers(2**31 - 1)),
+            n_jobs=-1,
+        )
+        chunk_forest.fit(preprocessor.transform(X_train), y_train)
+        if forest is None:
+            forest = chunk_forest
+
+        for tree in chunk_forest.estimators_:
+            n_seen_trees += 1
+            if len(trees) < max_trees:
+                trees.append(tree)
+            else:
+                j = int(rng.integers(n_seen_trees))
+                if j < max_trees:
+                    trees[j] = tree
+
+        n_train += len(X_train)
+        if verbose:
+            print(f"  bloc {i + 1} : {n_train} lignes d'entraînement, {len(trees)} arbres")
+
+    if forest is None:
+        raise ValueError(f"Aucune ligne d'entraînement dans : {path}")
+    forest.estimators_ = trees
+    forest.n_estimators = len(trees)
+    timings["forest_fit_s"] = time.perf_counter() - start
+
+    pipeline = Pipeline(steps=[("preprocessor", preprocessor), ("model", forest)])
+
+    start = time.perf_counter()
+    metrics = StreamingMetrics()
+    for _, _, X_test, y_test in iter_split_chunks(path, chunk_size, test_size):
+        if len(X_test):
+            metrics.update(y_test, pipeline.predict(X_test))
+    timings["evaluation_s"] = time.perf_counter() - start
+
+    results = metrics.result()
+    results["n_train"] = n_train
+    results.update(timings)
+    return pipeline, results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Entraînement hors mémoire (fichier lu par blocs)."
+    )
+    parser.add_argument("data", help="Dataset (.csv, .parquet, dossier de shards, .arrow)")
+    parser.add_argument("--chunk-size", type=int, default=500_000)
+    parser.add_argument("--trees-per-chunk", type=int, default=10)
+    parser.add_argument("--max-trees", type=int, default=200)
+    parser.add_argument("--max-depth", type=int, default=12)
+    parser.add_argument("--test-size", type=float, default=0.2)
+    parser.add_argument(
+        "--output",
+        default=os.path.join("models", "shopping_time_model.joblib"),
+    )
+    args = parser.parse_args()
+
+    print("Entraînement hors mémoire du modèle de temps de shopping...")
+    pipeline, results = train_streaming(
+        args.data,
+        chunk_size=args.chunk_size,
+        test_size=args.test_size,
+        trees_per_chunk=args.trees_per_chunk,
+        max_trees=args.max_trees,
+        max_depth=args.max_depth,
+    )
+
+    print(f"Évaluation sur le jeu de test ({results['n_test']} lignes) :")
+    print(f"  RMSE : {results['rmse']:.2f} minutes")
+    print(f"  MAE  : {results['mae']:.2f} minutes")
+    print(f"  R²   : {results['r2']:.3f}")
+    print(
+        f"Temps : préprocesseur {results['preprocessing_s']:.1f} s, "
+        f"forêt {results['forest_fit_s']:.1f} s, évaluation {results['evaluation_s']:.1f} s"
+    )
+
+    metadata = {
+        "source": "train_streaming",
+        "data_path": args.data,
+        "metrics": {key: results[key] for key in ("rmse", "mae", "r2")},
+        "fit_time_s": results["preprocessing_s"] + results["forest_fit_s"],
+        "n_rows": results["n_train"],
+    }
+    model_path = save_model(pipeline, args.output, metadata=metadata)
+    print(f"Modèle sauvegardé dans : {model_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import instrumentation as metrics
+from feature_encoder import FeatureEncoder
+from features import CATEGORICAL_FEATURES, FEATURES
+from model_store import MODEL_PATH, get_model_holder
+
+FOREST_PATH = "models/shopping_time_model.forest.npz"
+
+
+# ==========================
+# Export du pipeline en tableaux NumPy
+# ==========================
+def _flatten_tree(tree):
+    """
+    Renumérote les nœuds d'un arbre sklearn en largeur (BFS) pour que les deux
+    enfants d'un nœud soient contigus : enfant droit = enfant gauche + 1.
+    Une feuille pointe sur elle-même avec un seuil +inf, ce qui permet de
+    parcourir tous les arbres avec un nombre fixe d'itérations.
+    """
+    left, right = tree.children_left, tree.children_right
+    order = [0]
+    new_id = {0: 0}
+    i = 0
+    while i < len(order):
+        node = order[i]
+        if left[node] != -1:
+            for child in (left[node], right[node]):
+                new_id[child] = len(order)
+                order.append(child)
+        i += 1
+
+    order = np.asarray(order)
+    is_leaf = left[order] == -1
+    ids = np.arange(len(order))
+
+    feature = np.where(is_leaf, 0, tree.feature[order]).astype(np.int32)
+    threshold = np.where(is_leaf, np.inf, tree.threshold[order])
+    child = np.where(
+        is_leaf,
+        ids,
+        [new_id.get(c, 0) for c in left[order]],
+    ).astype(np.int64)
+    value = tree.value[order, 0, 0].astype(np.float64)
+    return feature, threshold, child, value
+
+
+def export_forest(pipeline):
+    """
+    Aplatit le préprocesseur (moyennes/écarts-types du scaler, catégories du
+    one-hot) et tous les arbres de la forêt en tableaux NumPy contigus.
+    """
+    preprocessor = pipeline.named_steps["preprocessor"]
+    model = pipeline.named_steps["model"]
+    if not hasattr(model, "estimators_") or not hasattr(model.estimators_[0], "tree_"):
+        raise ValueError("Seule une forêt (backend 'forest') peut être exportée.")
+
+    scaler = preprocessor.named_transformers_["num"].named_steps["scaler"]
+    encoder = preprocessor.named_transformers_["cat"]
+
+    arrays = {
+        "scaler_mean": scaler.mean_.astype(np.float64),
+        "scaler_scale": scaler.scale_.astype(np.float64),
+    }
+    for name, cats in zip(CATEGORICAL_FEATURES, encoder.categories_):
+        arrays[f"cat_{name}"] = np.asarray(cats, dtype=str)
+
+    features, thresholds, children, values, roots = [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for estimator in model.estimators_:
+        feature, threshold, child, value = _flatten_tree(estimator.tree_)
+        roots.append(offset)
+        features.append(feature)
+        thresholds.append(threshold)
+        children.append(child + offset)
+        values.append(value)
+        offset += len(feature)
+        max_depth = max(max_depth, estimator.tree_.max_depth)
+
+    arrays["feature"] = np.concatenate(features)
+    arrays["threshold"] = np.concatenate(thresholds)
+    arrays["child"] = np.concatenate(children)
+    arrays["value"] = np.concatenate(values)
+    arrays["roots"] = np.asarray(roots, dtype=np.int64)
+    arrays["max_depth"] = np.asarray(max_depth)
+    return arrays
+
+
+# ==========================
+# Prédicteur
+# ==========================
+class ForestPredictor:
+    """
+    Évalue la forêt exportée par `export_forest` sans passer par sklearn :
+    tous les arbres avancent d'un niveau à la fois, pour une ligne ou un lot.
+    """
+
+    def __init__(self, arrays, block_size=4096):
+        self.encoder = FeatureEncoder(
+            arrays["scaler_mean"],
+            arrays["scaler_scale"],
+            [arrays[f"cat_{name}"] for name in CATEGORICAL_FEATURES],
+        )
+
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.child = arrays["child"]
+        self.value = arrays["value"]
+        self.roots = arrays["roots"]
+        self.max_depth = int(arrays["max_depth"])
+        self.block_size = block_size
+
+    @classmethod
+    def from_pipeline(cls, pipeline):
+        return cls(export_forest(pipeline))
+
+    @classmethod
+    def load(cls, path=FOREST_PATH):
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {key: data[key] for key in data.files}
+        return cls(arrays)
+
+    def transform(self, X):
+        """Équivalent du ColumnTransformer entraîné (sortie float32)."""
+        if not isinstance(X, pd.DataFrame):
+            X = pd.DataFrame(X)
+        return self.encoder.encode_frame(X, dtype=np.float32)
+
+    def predict_transformed(self, Xt):
+        """Prédit à partir d'une matrice déjà encodée (n_lignes, n_features)."""
+        Xt = np.ascontiguousarray(Xt, dtype=np.float32)
+        n = Xt.shape[0]
+        y = np.empty(n, dtype=np.float64)
+        for start in range(0, n, self.block_size):
+            block = Xt[start:start + self.block_size]
+            y[start:start + len(block)] = self._predict_block(block)
+        return y
+
+    def _predict_block(self, block):
+        n_rows, n_features = block.shape
+        flat = block.ravel()
+        row_offset = (np.arange(n_rows, dtype=np.int64) * n_features)[:, None]
+
+        node = np.broadcast_to(self.roots, (n_rows, len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            x = flat[row_offset + self.feature[node]]
+            node = self.child[node] + (x > self.threshold[node])
+        return self.value[node].mean(axis=1)
+
+    def predict(self, X):
+        with metrics.timer("shopping_predict_stage_seconds", stage="encode"):
+            Xt = self.transform(X)
+        with metrics.timer("shopping_predict_stage_seconds", stage="tree_eval"):
+            return self.predict_transformed(Xt)
+
+    def predict_records(self, records):
+        """Prédit une liste de dicts sans construire de DataFrame."""
+        with metrics.timer("shopping_predict_stage_seconds", stage="encode"):
+            Xt = self.encoder.encode_batch(records, dtype=np.float32)
+        with metrics.timer("shopping_predict_stage_seconds", stage="tree_eval"):
+            return self.predict_transformed(Xt)
+
+    def save(self, path=FOREST_PATH):
+        arrays = {
+            "scaler_mean": self.encoder.scaler_mean,
+            "scaler_scale": self.encoder.scaler_scale,
+            "feature": self.feature,
+            "threshold": self.threshold,
+            "child": self.child,
+            "value": self.value,
+            "roots": self.roots,
+            "max_depth": np.asarray(self.max_depth),
+        }
+        for name, cats in zip(CATEGORICAL_FEATURES, self.encoder.categories):
+            arrays[f"cat_{name}"] = np.asarray(cats, dtype=str)
+        np.savez(path, **arrays)
+
+
+# ==========================
+# Vérification et benchmark
+# ==========================
+def check_agreement(pipeline, predictor, X, atol=1e-6):
+    expected = pipeline.predict(X)
+    got = predictor.predict(X)
+    max_diff = float(np.max(np.abs(expected - got)))
+    return max_diff, max_diff <= atol
+
+
+def _median_latency(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def benchmark(pipeline, predictor, X, repeats=50):
+    one_row = X.iloc[[0]]
+    records = X.to_dict("records")
+    paths = (
+        ("sklearn", pipeline.predict, one_row, X),
+        ("numpy", predictor.predict, one_row, X),
+        ("numpy+dict", predictor.predict_records, records[:1], records),
+    )
+    results = {}
+    for label, fn, single_input, batch_input in paths:
+        single = _median_latency(lambda: fn(single_input), repeats)
+        start = time.perf_counter()
+        fn(batch_input)
+        batch = time.perf_counter() - start
+        results[label] = {
+            "single_row_ms": single * 1000,
+            "batch_rows_per_s": len(X) / batch,
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Moteur NumPy pour la forêt entraînée.")
+    parser.add_argument("command", choices=["export", "benchmark"])
+    parser.add_argument("--data", default="data/shopping_data.csv")
+    parser.add_argument("--output", default=FOREST_PATH)
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    pipeline = get_model_holder(MODEL_PATH).get()
+    X = pd.read_csv(args.data)[FEATURES]
+
+    if args.command == "export":
+        predictor = ForestPredictor.from_pipeline(pipeline)
+        max_diff, ok = check_agreement(pipeline, predictor, X)
+        if not ok:
+            raise RuntimeError(f"Écart avec sklearn trop grand : {max_diff:.2e}")
+        predictor.save(args.output)
+        print(f"Forêt exportée dans : {args.output} ({len(predictor.feature)} nœuds)")
+        print(f"Écart max avec sklearn : {max_diff:.2e}")
+    else:
+        predictor = ForestPredictor.from_pipeline(pipeline)
+        results = benchmark(pipeline, predictor, X, repeats=args.repeats)
+        print(f"=== Benchmark ({len(X)} lignes) ===")
+        for label, res in results.items():
+            print(
+                f"  {label:10s} 1 ligne : {res['single_row_ms']:.3f} ms | "
+                f"lot : {res['batch_rows_per_s']:,.0f} lignes/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from joblib import Memory
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import HalvingRandomSearchCV
+
+from train_model import BACKENDS, create_pipeline, evaluate, load_data, split_data
+
+# Espaces de recherche par backend (paramètres du pas "model" du pipeline)
+PARAM_SPACES = {
+    "forest": {
+        "model__n_estimators": [50, 100, 200, 300],
+        "model__max_depth": [8, 10, 12, 16, None],
+        "model__min_samples_leaf": [1, 2, 5, 10],
+        "model__max_features": [1.0, 0.5, "sqrt"],
+    },
+    "hgb": {
+        "model__learning_rate": [0.03, 0.05, 0.1, 0.2],
+        "model__max_leaf_nodes": [15, 31, 63],
+        "model__min_samples_leaf": [10, 20, 50],
+        "model__l2_regularization": [0.0, 0.1, 1.0],
+        "model__max_iter": [200, 500],
+    },
+}
+
+
+# ==========================
+# Recherche par successive halving
+# ==========================
+def run_search(X_train, y_train, backend, n_candidates=40, cv=3, workers=-1, cache_dir=None, random_state=42):
+    """
+    Successive halving sur tous les cœurs (`n_jobs`). Le pipeline reçoit un
+    `memory` joblib : le ColumnTransformer ajusté est mis en cache et n'est
+    calculé qu'une fois par fold (et par taille d'échantillon), pas une fois
+    par candidat.
+    """
+    pipeline = create_pipeline(backend)
+    pipeline.memory = Memory(cache_dir, verbose=0)
+    if "n_jobs" in pipeline.named_steps["model"].get_params():
+        # Le parallélisme est déjà au niveau des candidats/folds
+        pipeline.set_params(model__n_jobs=1)
+
+    search = HalvingRandomSearchCV(
+        pipeline,
+        PARAM_SPACES[backend],
+        n_candidates=n_candidates,
+        factor=3,
+        resource="n_samples",
+        min_resources="exhaust",
+        cv=cv,
+        scoring="neg_root_mean_squared_error",
+        n_jobs=workers,
+        random_state=random_state,
+        refit=False,
+    )
+    search.fit(X_train, y_train)
+    return search
+
+
+def build_leaderboard(search, cv):
+    """
+    Une ligne par configuration, au dernier tour de halving qu'elle a atteint :
+    RMSE de validation croisée, temps d'entraînement, temps de prédiction
+    ramené à 1 000 lignes.
+    """
+    results = pd.DataFrame(search.cv_results_)
+    results["params_key"] = results["params"].map(lambda p: repr(sorted(p.items())))
+    last = results.sort_values("iter").groupby("params_key").tail(1)
+
+    n_test_rows = last["n_resources"] / cv
+    leaderboard = pd.DataFrame(
+        {
+            "iter": last["iter"],
+            "n_samples": last["n_resources"],
+            "cv_rmse": -last["mean_test_score"],
+            "cv_rmse_std": last["std_test_score"],
+            "fit_s": last["mean_fit_time"],
+            "predict_ms_per_1k": last["mean_score_time"] / n_test_rows * 1000 * 1000,
+            "params": last["params"],
+        }
+    )
+    return leaderboard.sort_values(["iter", "cv_rmse"], ascending=[False, True]).reset_index(drop=True)
+
+
+def evaluate_top(leaderboard, backend, X_train, y_train, X_test, y_test, top_k=5, repeats=20):
+    """Réentraîne les `top_k` premières configurations et mesure le coût réel."""
+    rows = []
+    one_row = X_test.iloc[[0]]
+    for params in leaderboard["params"].head(top_k):
+        pipeline = create_pipeline(backend)
+        pipeline.set_params(**params)
+
+        start = time.perf_counter()
+        pipeline.fit(X_train, y_train)
+        fit_time = time.perf_counter() - start
+
+        pipeline.predict(one_row)
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            pipeline.predict(one_row)
+            times.append(time.perf_counter() - start)
+
+        metrics = evaluate(pipeline, X_test, y_test)
+        rows.append(
+            {
+                "test_rmse": metrics["rmse"],
+                "test_mae": metrics["mae"],
+                "full_fit_s": fit_time,
+                "single_row_ms": float(np.median(times)) * 1000,
+            }
+        )
+    top = leaderboard.head(top_k).copy()
+    return pd.concat([top.reset_index(drop=True), pd.DataFrame(rows)], axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recherche d'hyperparamètres (successive halving).")
+    parser.add_argument("--data", default="data/shopping_data.csv")
+    parser.add_argument("--backend", choices=BACKENDS, default="forest")
+    parser.add_argument("--n-candidates", type=int, default=40)
+    parser.add_argument("--cv", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=-1)
+    parser.add_argument("--top-k", type=int, default=5, help="Configurations réentraînées et chronométrées")
+    parser.add_argument("--output", default=os.path.join("models", "tuning_leaderboard.csv"))
+    args = parser.parse_args()
+
+    print(f"=== Recherche d'hyperparamètres ({args.backend}) ===")
+    df = load_data(args.data)
+    X_train, X_test, y_train, y_test = split_data(df)
+
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as cache_dir:
+        search = run_search(
+            X_train,
+            y_train,
+            args.backend,
+            n_candidates=args.n_candidates,
+            cv=args.cv,
+            workers=args.workers,
+            cache_dir=cache_dir,
+        )
+    print(f"Recherche terminée en {time.perf_counter() - start:.1f} s ({search.n_iterations_} tours)")
+
+    leaderboard = build_leaderboard(search, args.cv)
+    top = evaluate_top(leaderboard, args.backend, X_train, y_train, X_test, y_test, top_k=args.top_k)
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    leaderboard.to_csv(args.output, index=False)
+
+    with pd.option_context("display.max_colwidth", 80, "display.width", 200):
+        print("\nClassement (dernier tour atteint, puis RMSE de validation croisée) :")
+        print(leaderboard.drop(columns="params").head(15).to_string(float_format="%.3f"))
+        print(f"\nTop {args.top_k} réentraînés sur tout le train :")
+        print(top.to_string(float_format="%.3f"))
+    print(f"\nClassement complet : {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from dataset_format import CATEGORIES
+from feature_encoder import complete_record, predict_frame, predict_records
+from features import FEATURES, ITEM_COLUMNS, RAW_VISIT_COLUMNS, add_derived_features
+from model_store import MODEL_PATH, get_model_holder
+
+PREDICTION_COL = "predicted_time_min"
+
+# Valeurs balayées par défaut pour chaque axe possible
+SWEEP_AXES = {
+    "hour": list(range(24)),
+    "day_of_week": list(range(7)),
+    "store_type": CATEGORIES["store_type"],
+    "special_event": CATEGORIES["special_event"],
+    "profile": CATEGORIES["profile"],
+    **{col: list(range(0, 21, 2)) for col in ITEM_COLUMNS},
+}
+
+DAY_LABELS = ["lundi", "mardi", "mercredi", "jeudi", "vendredi", "samedi", "dimanche"]
+
+
+# ==========================
+# Balayage
+# ==========================
+def build_sweep_frame(base, axes):
+    """
+    Produit cartésien des `axes` ({colonne brute: valeurs}) autour de la
+    visite `base` : une ligne par combinaison (ordre C, dernier axe le plus
+    rapide), les autres colonnes reprennent la visite de base. Les variables
+    dérivées (période, flags, totaux) sont recalculées ligne par ligne.
+    """
+    unknown = [name for name in axes if name not in RAW_VISIT_COLUMNS]
+    if unknown:
+        raise ValueError(f"Axes inconnus : {unknown} (colonnes possibles : {', '.join(RAW_VISIT_COLUMNS)})")
+
+    values = complete_record(base)
+    names = list(axes)
+    shape = tuple(len(axes[name]) for name in names)
+    positions = np.unravel_index(np.arange(int(np.prod(shape))), shape)
+
+    n_rows = len(positions[0])
+    columns = {name: np.asarray(axes[name])[pos] for name, pos in zip(names, positions)}
+    for col in RAW_VISIT_COLUMNS:
+        if col not in axes:
+            columns[col] = np.full(n_rows, values[col])
+    return add_derived_features(pd.DataFrame(columns))
+
+
+def sweep(model, base, axes):
+    """
+    Prédit toutes les combinaisons des `axes` en un seul predict vectorisé.
+    Retourne un DataFrame long : une colonne par axe + `predicted_time_min`.
+    """
+    df = build_sweep_frame(base, axes)
+    result = df[list(axes)].copy()
+    result[PREDICTION_COL] = predict_frame(model, df[FEATURES])
+    return result
+
+
+def to_grid(result, row_axis, col_axis, reduce="mean"):
+    """Tableau croisé (ligne x colonne) pour une heatmap ; autres axes agrégés."""
+    return result.pivot_table(index=row_axis, columns=col_axis, values=PREDICTION_COL, aggfunc=reduce)
+
+
+# ==========================
+# Benchmark
+# ==========================
+def _median_ms(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)) * 1000
+
+
+def benchmark(model, base, axes, repeats=20):
+    predict_records(model, [base])  # préchauffage
+    single = _median_ms(lambda: predict_records(model, [base]), repeats)
+    full = _median_ms(lambda: sweep(model, base, axes), repeats)
+    n_rows = int(np.prod([len(values) for values in axes.values()]))
+    return {"single_ms": single, "sweep_ms": full, "rows": n_rows}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Balayage what-if autour d'une visite.")
+    parser.add_argument("--axes", nargs="+", default=["hour", "day_of_week", "store_type"], choices=list(SWEEP_AXES))
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    base = {
+        "age": 35,
+        "gender": "femme",
+        "profile": "normal",
+        "store_type": "supermarche",
+        "day_of_week": 5,
+        "hour": 15,
+        "special_event": "aucun",
+        "has_shopping_list": 1,
+        "items_alimentaire": 12,
+        "items_vetements": 1,
+        "items_electronique": 0,
+        "items_maison": 2,
+        "items_beaute": 1,
+        "items_sport": 0,
+        "items_librairie": 0,
+    }
+    axes = {name: SWEEP_AXES[name] for name in args.axes}
+    model = get_model_holder(MODEL_PATH).get()
+
+    result = sweep(model, base, axes)
+    if len(args.axes) >= 2:
+        grid = to_grid(result, args.axes[0], args.axes[1])
+        print(f"=== {args.axes[0]} x {args.axes[1]} (moyenne sur les autres axes) ===")
+        print(grid.round(1).to_string())
+
+    bench = benchmark(model, base, axes, repeats=args.repeats)
+    print(
+        f"\n{bench['rows']} combinaisons en {bench['sweep_ms']:.1f} ms "
+        f"(une prédiction seule : {bench['single_ms']:.1f} ms)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+# Les modules sont à plat dans src/ (lancés avec PYTHONPATH=src)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+
+@pytest.fixture(scope="session")
+def small_forest():
+    """Petite forêt entraînée sur un dataset synthétique, et son jeu de test."""
+    from generate_data import generate_shopping_dataset
+    from train_model import create_pipeline, split_data
+
+    X_train, X_test, y_train, _ = split_data(generate_shopping_dataset(2_000, random_state=0))
+    pipeline = create_pipeline("forest")
+    pipeline.set_params(model__n_estimators=10, model__max_depth=6, model__n_jobs=1)
+    pipeline.fit(X_train, y_train)
+    return pipeline, X_test
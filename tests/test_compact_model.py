@@ -0,0 +1,41 @@
+import os
+
+import numpy as np
+
+from compact_model import CompactForestPredictor, compact_arrays, save_compact, select_trees
+from tree_engine import export_forest
+
+
+def test_compact_predictor_matches_pipeline(small_forest, tmp_path):
+    pipeline, X_test = small_forest
+    path = save_compact(compact_arrays(export_forest(pipeline)), str(tmp_path / "compact"))
+    predictor = CompactForestPredictor.load(path)
+    # Feuilles en float32 : écart de l'ordre de 1e-6 sur des minutes
+    assert np.allclose(predictor.predict(X_test), pipeline.predict(X_test), atol=1e-4)
+
+
+def test_selected_trees_match_sub_forest(small_forest, tmp_path):
+    pipeline, X_test = small_forest
+    keep = [0, 3, 7]
+    arrays = compact_arrays(select_trees(export_forest(pipeline), keep))
+    predictor = CompactForestPredictor.load(save_compact(arrays, str(tmp_path / "compact")))
+
+    Xt = pipeline.named_steps["preprocessor"].transform(X_test)
+    estimators = pipeline.named_steps["model"].estimators_
+    expected = np.mean([estimators[t].predict(Xt) for t in keep], axis=0)
+    assert np.allclose(predictor.predict(X_test), expected, atol=1e-4)
+
+
+def test_save_swaps_versions_through_a_link(small_forest, tmp_path):
+    pipeline, X_test = small_forest
+    arrays = export_forest(pipeline)
+    path = str(tmp_path / "compact")
+
+    for n_trees in (2, 4, 6):
+        save_compact(compact_arrays(select_trees(arrays, range(n_trees))), path)
+        assert len(CompactForestPredictor.load(path).roots) == n_trees
+
+    # Version courante + précédente gardées, les autres supprimées
+    versions = [entry for entry in os.listdir(tmp_path) if entry.startswith("compact.v-")]
+    assert len(versions) == 2
+    assert os.path.islink(path)
@@ -0,0 +1,43 @@
+import pandas as pd
+import pytest
+
+from dataset_format import apply_schema, read_dataset
+
+
+def test_apply_schema_rejects_unknown_category():
+    df = pd.DataFrame({"store_type": ["boutique", "drive", None]})
+    with pytest.raises(ValueError, match="drive"):
+        apply_schema(df)
+
+
+def test_apply_schema_keeps_missing_values():
+    df = pd.DataFrame({"store_type": ["boutique", None], "age": [30, 40]})
+    result = apply_schema(df)
+    assert result["store_type"].isna().tolist() == [False, True]
+    assert str(result["age"].dtype) == "int8"
+
+
+def test_apply_schema_rejects_int_overflow():
+    df = pd.DataFrame({"age": [30, 200]})
+    with pytest.raises(ValueError, match="age"):
+        apply_schema(df)
+
+
+def test_read_csv_rejects_int_overflow(tmp_path):
+    path = tmp_path / "visites.csv"
+    path.write_text("age,store_type\n200,boutique\n")
+    with pytest.raises(ValueError, match="age"):
+        read_dataset(str(path))
+
+
+def test_read_dataset_reads_parquet_shards(tmp_path):
+    shards = tmp_path / "shards"
+    shards.mkdir()
+    for i, store_type in enumerate(["boutique", "supermarche"]):
+        df = pd.DataFrame({"age": [30 + i], "store_type": [store_type]})
+        df.to_parquet(shards / f"part-{i:05d}.parquet", index=False)
+
+    result = read_dataset(str(shards))
+    assert sorted(result["age"].tolist()) == [30, 31]
+    assert str(result["age"].dtype) == "int8"
+    assert isinstance(result["store_type"].dtype, pd.CategoricalDtype)
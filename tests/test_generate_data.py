@@ -0,0 +1,31 @@
+import pandas as pd
+
+import generate_data
+from generate_data import generate_dataset_parallel, generate_dataset_to_file
+
+
+def test_output_independent_of_chunk_size_and_workers(tmp_path, monkeypatch):
+    # Petits blocs logiques : plusieurs blocs par shard sans gros dataset
+    monkeypatch.setattr(generate_data, "BLOCK_SIZE", 700)
+    n_samples, n_shards = 3_000, 2
+
+    frames = []
+    for chunk_size in (250, 2_000):
+        path = tmp_path / f"file_{chunk_size}.parquet"
+        generate_dataset_to_file(str(path), n_samples, chunk_size=chunk_size, n_shards=n_shards, verbose=False)
+        frames.append(pd.read_parquet(path))
+    for workers in (1, 2):
+        _, paths = generate_dataset_parallel(
+            str(tmp_path / f"shards_{workers}"), n_samples, n_shards, workers=workers, chunk_size=400
+        )
+        frames.append(pd.concat([pd.read_parquet(p) for p in paths], ignore_index=True))
+
+    assert len(frames[0]) == n_samples
+    for frame in frames[1:]:
+        pd.testing.assert_frame_equal(frame, frames[0])
+
+
+def test_empty_dataset_keeps_columns():
+    empty = generate_data.generate_shopping_dataset(0)
+    assert len(empty) == 0
+    assert list(empty.columns) == list(generate_data.generate_shopping_dataset(10).columns)
@@ -0,0 +1,33 @@
+import logging
+
+import joblib
+
+from model_store import ModelHolder
+from model_registry import registry_for
+
+
+def test_direct_write_to_exported_copy_is_ignored_with_warning(tmp_path, caplog):
+    path = str(tmp_path / "model.joblib")
+    registry = registry_for(path)
+    model_id = registry.promote(registry.register({"model": "v1"}))
+    registry.export(model_id, path)
+
+    holder = ModelHolder(path, mmap_mode=None, check_interval=0)
+    with caplog.at_level(logging.WARNING, logger="model_store"):
+        assert holder.get() == {"model": "v1"}
+        assert not caplog.records
+
+        joblib.dump({"model": "v2"}, path)
+        assert holder.get() == {"model": "v1"}
+    assert "diffère du modèle courant" in caplog.text
+
+
+def test_get_versioned_follows_promotion(tmp_path):
+    path = str(tmp_path / "model.joblib")
+    registry = registry_for(path)
+    v1 = registry.promote(registry.register({"model": "v1"}))
+    holder = ModelHolder(path, mmap_mode=None, check_interval=0)
+    assert holder.get_versioned() == ({"model": "v1"}, v1[:12])
+
+    v2 = registry.promote(registry.register({"model": "v2"}))
+    assert holder.get_versioned() == ({"model": "v2"}, v2[:12])
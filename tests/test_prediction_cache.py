@@ -0,0 +1,153 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import prediction_cache
+from features import FEATURES, add_derived_features
+from prediction_cache import PredictionCache, canonical_key, frame_keys
+
+VISIT = {
+    "age": 35,
+    "gender": "femme",
+    "profile": "normal",
+    "store_type": "supermarche",
+    "day_of_week": 5,
+    "hour": 15,
+    "special_event": "aucun",
+    "has_shopping_list": 1,
+    "items_alimentaire": 12,
+    "items_vetements": 1,
+    "items_electronique": 0,
+    "items_maison": 2,
+    "items_beaute": 1,
+    "items_sport": 0,
+    "items_librairie": 0,
+}
+
+
+class CountingPredictor:
+    """predict_missing factice : renvoie la position, compte les appels."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, indices):
+        self.calls.append(list(indices))
+        return [float(i) for i in indices]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(prediction_cache.time, "monotonic", clock)
+    return clock
+
+
+# ==========================
+# Clé canonique
+# ==========================
+def test_key_keeps_exact_numeric_values():
+    assert canonical_key(VISIT) == canonical_key({**VISIT, "age": 35.0})
+    assert canonical_key(VISIT) != canonical_key({**VISIT, "age": 35.4})
+
+
+def test_key_is_none_for_nan():
+    assert canonical_key({**VISIT, "age": math.nan}) is None
+    assert canonical_key({**VISIT, "items_sport": math.nan}) is None
+
+
+def test_frame_keys_match_record_keys():
+    records = [VISIT, {**VISIT, "age": 21.4}, {**VISIT, "age": math.nan}]
+    X = add_derived_features(pd.DataFrame(records))[FEATURES]
+    assert frame_keys(X) == [canonical_key(VISIT), canonical_key(records[1]), None]
+
+
+# ==========================
+# Cache
+# ==========================
+def test_hits_misses_and_deduplication(clock):
+    cache = PredictionCache(max_size=10)
+    predictor = CountingPredictor()
+
+    y = cache.predict_keys(["a", "b", "a"], predictor)
+    assert predictor.calls == [[0, 1]]
+    assert y.tolist() == [0.0, 1.0, 0.0]
+
+    y = cache.predict_keys(["b", "a"], predictor)
+    assert len(predictor.calls) == 1
+    assert y.tolist() == [1.0, 0.0]
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (2, 3, 2)
+
+
+def test_uncacheable_keys_go_to_the_model(clock):
+    cache = PredictionCache(max_size=10)
+    predictor = CountingPredictor()
+
+    cache.predict_keys([None, None], predictor)
+    cache.predict_keys([None], predictor)
+    assert predictor.calls == [[0, 1], [0]]
+    assert cache.stats()["size"] == 0
+
+
+def test_lru_eviction(clock):
+    cache = PredictionCache(max_size=2)
+    predictor = CountingPredictor()
+
+    cache.predict_keys(["a", "b"], predictor)
+    cache.predict_keys(["a"], predictor)  # "b" devient le moins récent
+    cache.predict_keys(["c"], predictor)
+    assert cache.stats()["evictions"] == 1
+
+    predictor.calls.clear()
+    cache.predict_keys(["a", "b"], predictor)
+    assert predictor.calls == [[1]]
+
+
+def test_ttl_expiry(clock):
+    cache = PredictionCache(max_size=10, ttl=60)
+    predictor = CountingPredictor()
+
+    cache.predict_keys(["a"], predictor)
+    clock.now += 59
+    cache.predict_keys(["a"], predictor)
+    assert len(predictor.calls) == 1
+
+    clock.now += 1
+    cache.predict_keys(["a"], predictor)
+    assert len(predictor.calls) == 2
+
+
+def test_version_change_clears_cache(clock):
+    cache = PredictionCache(max_size=10)
+    predictor = CountingPredictor()
+
+    cache.predict_keys(["a"], predictor, version="v1")
+    cache.predict_keys(["a"], predictor, version="v1")
+    assert len(predictor.calls) == 1
+
+    cache.predict_keys(["a"], predictor, version="v2")
+    assert len(predictor.calls) == 2
+    assert cache.stats()["model_version"] == "v2"
+
+
+def test_predict_frame_distinguishes_fractional_values(clock):
+    class Model:
+        def predict(self, X):
+            return X["age"].to_numpy(dtype=np.float64)
+
+    records = [VISIT, {**VISIT, "age": 35.4}, VISIT]
+    X = add_derived_features(pd.DataFrame(records))[FEATURES]
+    y = PredictionCache(max_size=10).predict_frame(Model(), X)
+    assert y.tolist() == [35.0, 35.4, 35.0]
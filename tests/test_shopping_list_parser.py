@@ -0,0 +1,24 @@
+from shopping_list_parser import MAX_QUANTITY, iter_items, parse_shopping_list_text
+
+
+def test_quantity_before_keyword():
+    counts = parse_shopping_list_text("10 yaourts\n2x jean")
+    assert counts["items_alimentaire"] == 10
+    assert counts["items_vetements"] == 2
+
+
+def test_longest_keyword_wins():
+    assert list(iter_items("riz cassé")) == [("riz cassé", "alimentaire", 1)]
+
+
+def test_keyword_inside_a_word_is_ignored():
+    assert list(iter_items("barbecue")) == []
+    assert sum(parse_shopping_list_text("barbecue").values()) == 0
+
+
+def test_decimal_quantity_keeps_integer_part():
+    assert parse_shopping_list_text("12,5 tomates")["items_alimentaire"] == 12
+
+
+def test_quantity_is_capped():
+    assert parse_shopping_list_text("5000 stylos")["items_librairie"] == MAX_QUANTITY == 999
@@ -0,0 +1,20 @@
+import numpy as np
+
+from tree_engine import ForestPredictor
+
+
+def test_forest_predictor_matches_pipeline(small_forest):
+    pipeline, X_test = small_forest
+    predictor = ForestPredictor.from_pipeline(pipeline)
+    expected = pipeline.predict(X_test)
+
+    assert np.allclose(predictor.predict(X_test), expected, atol=1e-6)
+    records = X_test.head(5).to_dict("records")
+    assert np.allclose(predictor.predict_records(records), expected[:5], atol=1e-6)
+
+
+def test_forest_predictor_round_trips_through_npz(small_forest, tmp_path):
+    pipeline, X_test = small_forest
+    path = str(tmp_path / "forest.npz")
+    ForestPredictor.from_pipeline(pipeline).save(path)
+    assert np.allclose(ForestPredictor.load(path).predict(X_test), pipeline.predict(X_test), atol=1e-6)